@@ -0,0 +1,281 @@
+"""回归检查
+
+用伪造的 Context、消息事件和 OneBot 客户端复现曾经出现过的问题，确认它们没有再次出现。
+任一检查失败时以非零状态退出。
+
+    python benchmarks/checks.py [检查名 ...]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import sys
+import time
+from contextlib import asynccontextmanager, contextmanager
+from datetime import date
+
+import common
+from fakes import FakeEvent, FakeOneBotClient
+
+CHECKS = {}
+
+
+def check(func):
+    CHECKS[func.__name__] = func
+    return func
+
+
+def expect(condition: bool, message: str):
+    if not condition:
+        raise AssertionError(message)
+
+
+@contextmanager
+def temp_data_dir(prepare=None, **config):
+    """写好插件配置的临时数据目录；prepare(data_dir) 准备其他数据文件"""
+    data_dir = common.make_data_dir()
+    try:
+        common.write_config(data_dir, **config)
+        if prepare is not None:
+            prepare(data_dir)
+        yield data_dir
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+@asynccontextmanager
+async def running_plugin(data_dir: str, client: FakeOneBotClient = None):
+    """创建插件并等待启动任务完成，退出时卸载（写回记录）"""
+    plugin = await common.create_plugin(data_dir, client)
+    try:
+        yield plugin
+    finally:
+        await plugin.terminate()
+
+
+def keyword(plugin, user_id, text: str = "给我点赞", **kwargs):
+    kwargs.setdefault('self_id', common.SELF_ID)
+    return common.drain(plugin.keyword_like(FakeEvent(text, user_id, **kwargs)))
+
+
+def write_legacy_records(data_dir: str):
+    """启用分片前的全局记录：用户 555 今天已点赞"""
+    with open(os.path.join(data_dir, 'like_records.json'), 'w', encoding='utf-8') as f:
+        json.dump({'555': {'date': date.today().isoformat(), 'count': 3, 'timestamp': None}}, f)
+
+
+@check
+async def legacy_records_after_upgrade():
+    """升级后 like_records.json 中今天已点赞的用户不会被再次点赞（默认分片配置）"""
+    for storage_mode in ('json', 'sqlite'):
+        client = FakeOneBotClient()
+        with temp_data_dir(write_legacy_records, storage_mode=storage_mode) as data_dir:
+            async with running_plugin(data_dir, client) as plugin:
+                replies = await keyword(plugin, 555)
+            expect(client.calls == 0, f"{storage_mode}: 分片前已点赞的用户又调用了 send_like")
+            expect(replies == [common.plugin_main.ALREADY_LIKED_REPLY], f"{storage_mode}: 回复 {replies}")
+            if storage_mode == 'sqlite':
+                migrated = os.path.join(data_dir, 'like_records.json.migrated')
+                expect(os.path.exists(migrated), "sqlite: like_records.json 没有迁移到数据库")
+
+
+@check
+async def trend_keeps_past_days():
+    """用户今天再次点赞后，昨天的统计不变，重启后也不变"""
+    storage = [('json', 'json'), ('json', 'binary'), ('journal', 'json'), ('shared', 'json'), ('sqlite', 'json')]
+    for storage_mode, snapshot_format in storage:
+        name = f"{storage_mode}/{snapshot_format}"
+        users = range(common.FIRST_USER, common.FIRST_USER + 5)
+        with temp_data_dir(storage_mode=storage_mode, snapshot_format=snapshot_format,
+                           reply_cooldown_user=0) as data_dir:
+            async with running_plugin(data_dir) as plugin:
+                namespace = plugin.like_store.namespace(common.PLATFORM, common.SELF_ID)
+                today = plugin.current_day
+                plugin.current_day = today - 1
+                for user_id in users:
+                    await keyword(plugin, user_id)
+                plugin.current_day = today
+                yesterday = (await plugin.like_store.recent_stats(namespace, today, 2))[0]
+                expect(yesterday[1] == 5, f"{name}: 昨天的点赞人数为 {yesterday[1]}")
+                for user_id in users:
+                    await keyword(plugin, user_id)
+                series = await plugin.like_store.recent_stats(namespace, today, 2)
+                expect(series[0] == yesterday, f"{name}: 今天点赞后昨天的统计变为 {series[0]}")
+                expect(series[1][1] == 5, f"{name}: 今天的点赞人数为 {series[1][1]}")
+            async with running_plugin(data_dir) as plugin:
+                restarted = await plugin.like_store.recent_stats(namespace, today, 2)
+            expect(restarted == series, f"{name}: 重启后统计从 {series} 变为 {restarted}")
+
+
+@check
+async def queue_full_is_not_a_failed_like():
+    """调度队列已满时好友不会被缓存为点赞失败，之后重试能正常点赞"""
+    users = [common.FIRST_USER + i for i in range(5)]
+    client = FakeOneBotClient(latency=0.2, friends=users)
+    with temp_data_dir(friend_check=True, like_queue_size=1, like_workers=1, like_rate_per_second=0) as data_dir:
+        async with running_plugin(data_dir, client) as plugin:
+            # 第一次点赞时拉取好友列表
+            await keyword(plugin, users[0])
+            await asyncio.gather(*[keyword(plugin, user_id) for user_id in users[1:]])
+            negative = plugin.friend_cache.stats()['negative']['size']
+            expect(negative == 0, f"队列已满的 {negative} 个好友被缓存为点赞失败")
+            calls = client.calls
+            retried = await asyncio.gather(*[keyword(plugin, user_id) for user_id in users[1:]])
+            # 上一轮没有排上队的用户现在应当真正调用 send_like
+            expect(client.calls > calls, f"重试时没有调用 send_like: {retried}")
+
+
+@check
+async def preload_off_loads_lazily():
+    """preload_records: false 时启动不加载分片，分片首次加载时清理过期记录"""
+    users = 1400
+    with temp_data_dir(lambda data_dir: common.generate_records(data_dir, users), preload_records=False) as data_dir:
+        async with running_plugin(data_dir) as plugin:
+            loaded = list(plugin.like_store._shards)
+            expect(not loaded, f"启动后已加载分片: {loaded}")
+            namespace = plugin.like_store.namespace(common.PLATFORM, common.SELF_ID)
+            expect(await plugin.is_user_liked_today(str(common.FIRST_USER), namespace), "今天已点赞的用户查询不到")
+            # 第 i 个用户的记录在 i % 14 天前，超过 7 天的 6/14 应被清理
+            remaining = await plugin.like_store.user_count(namespace)
+            expect(remaining == users * 8 // 14, f"分片加载后剩余 {remaining} 条记录")
+
+
+@check
+async def unsupported_platform_writes_nothing():
+    """不支持点赞的平台上的触发消息不读写点赞记录"""
+    with temp_data_dir(storage_mode='journal') as data_dir:
+        async with running_plugin(data_dir) as plugin:
+            for _ in range(3):
+                replies = await keyword(plugin, 555, platform_name='telegram', self_id='bot')
+                expect(replies == [common.plugin_main.LIKE_FAILED_REPLY], f"回复 {replies}")
+            loaded = list(plugin.like_store._shards)
+        expect(not loaded, f"加载了分片: {loaded}")
+        expect(not os.path.exists(os.path.join(data_dir, 'shards', 'telegram_bot')), "创建了 telegram 的分片目录")
+
+
+@check
+async def write_during_flush_is_persisted():
+    """写盘期间产生的变更会再次写回，写盘失败后会重试"""
+    LikeRecord = common.record_format.LikeRecord
+    today = date.today().toordinal()
+    data_dir = common.make_data_dir()
+    io = common.persistence.AsyncFileIO()
+    store = common.records.LikeRecordStore(os.path.join(data_dir, 'records.json'), io, flush_delay=0.02)
+    loop = asyncio.get_running_loop()
+    writing = asyncio.Event()
+    writes = []
+    write_snapshot = store._write_snapshot
+
+    def slow_write(*args):
+        writes.append(set(args[0]))
+        loop.call_soon_threadsafe(writing.set)
+        time.sleep(0.2)
+        # 第二次写盘失败
+        if len(writes) == 2:
+            raise OSError("磁盘已满")
+        write_snapshot(*args)
+
+    try:
+        await store.load()
+        store._write_snapshot = slow_write
+        await store.set('1', LikeRecord(today, 1))
+        await writing.wait()
+        # 第一次写盘进行中时写入新记录
+        await store.set('2', LikeRecord(today, 2))
+        on_disk = {}
+        for _ in range(100):
+            await asyncio.sleep(0.02)
+            on_disk = common.persistence.read_json_file(store.file_path, {})
+            if '2' in on_disk:
+                break
+        expect(set(on_disk) == {'1', '2'}, f"磁盘上的记录为 {sorted(on_disk)}，写盘 {len(writes)} 次")
+        expect(len(writes) == 3, f"写盘 {len(writes)} 次，应为 3 次（写入、失败、重试）")
+        expect(not store._dirty, "记录已写回但仍标记为脏")
+    finally:
+        await store.close()
+        io.shutdown()
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def shared_store_worker(path: str, prefix: int, writes: int):
+    """shared_store_across_processes 的子进程：写入 writes 条记录，期间也查询其他进程的记录"""
+    logging.disable(logging.ERROR)
+
+    async def work():
+        io = common.persistence.AsyncFileIO()
+        store = common.records.SharedLikeRecordStore(path, io, flush_delay=0.05, compact_bytes=2048)
+        await store.load()
+        today = date.today().toordinal()
+        for i in range(writes):
+            await store.set(f"{prefix}{i:05d}", common.record_format.LikeRecord(today, 1, int(time.time())))
+            if i % 7 == 0:
+                await store.is_liked_on(f"{prefix % 4 + 1}{i:05d}", today)
+        await store.close()
+        io.shutdown()
+
+    asyncio.run(work())
+
+
+@check
+async def shared_store_across_processes():
+    """多个进程同时写 shared 存储（日志频繁压缩、其他进程重新加载快照）后记录和每日统计都不丢"""
+    processes, writes = 4, 400
+    data_dir = common.make_data_dir()
+    path = os.path.join(data_dir, 'like_records.json')
+    io = common.persistence.AsyncFileIO()
+    try:
+        context = multiprocessing.get_context('spawn')
+        workers = [context.Process(target=shared_store_worker, args=(path, prefix, writes))
+                   for prefix in range(1, processes + 1)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            await asyncio.to_thread(worker.join)
+        expect(all(worker.exitcode == 0 for worker in workers),
+               f"子进程退出码 {[worker.exitcode for worker in workers]}")
+        store = common.records.SharedLikeRecordStore(path, io)
+        await store.load()
+        total = processes * writes
+        users = await store.user_count()
+        stats = await store.day_stats(date.today().toordinal())
+        expect(users == total, f"共享存储中有 {users}/{total} 条记录")
+        expect(stats == (total, total), f"今天的统计为 {stats}，应为 ({total}, {total})")
+        expect(store._generation, "日志没有被压缩过")
+        await store.close()
+    finally:
+        io.shutdown()
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+async def run(names: list) -> int:
+    failed = 0
+    for name in names:
+        try:
+            await CHECKS[name]()
+        except Exception as e:
+            failed += 1
+            print(f"✗ {name}: {e}")
+        else:
+            print(f"✓ {name}")
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('names', nargs='*', help=f"要运行的检查，默认全部: {', '.join(CHECKS)}")
+    args = parser.parse_args()
+    unknown = [name for name in args.names if name not in CHECKS]
+    if unknown:
+        parser.error(f"未知的检查: {', '.join(unknown)}")
+    names = args.names or list(CHECKS)
+    logging.disable(logging.ERROR)
+    failed = asyncio.run(run(names))
+    print(f"\n{len(names) - failed} 项通过, {failed} 项失败")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
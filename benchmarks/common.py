@@ -0,0 +1,172 @@
+"""基准脚本共用的工具：导入插件、生成记录、创建插件实例、统计耗时和保存结果"""
+import asyncio
+import importlib
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+
+from fakes import FakeContext, FakeOneBotClient
+
+PLUGIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+# 插件使用相对导入，按目录名作为包导入（需要已安装 AstrBot）
+sys.path.insert(0, os.path.dirname(PLUGIN_DIR))
+plugin_main = importlib.import_module(f"{os.path.basename(PLUGIN_DIR)}.main")
+record_format = importlib.import_module(f"{os.path.basename(PLUGIN_DIR)}.record_format")
+matcher = importlib.import_module(f"{os.path.basename(PLUGIN_DIR)}.matcher")
+records = importlib.import_module(f"{os.path.basename(PLUGIN_DIR)}.records")
+persistence = importlib.import_module(f"{os.path.basename(PLUGIN_DIR)}.persistence")
+
+PLATFORM = 'aiocqhttp'
+SELF_ID = '10000'
+# 生成的用户 ID 从这里开始，避开管理员账号
+FIRST_USER = 100000
+
+# 压测使用的配置：不限速，避免 send_like 限速掩盖插件自身的开销
+BENCH_CONFIG = {
+    'min_likes': 1,
+    'max_likes': 10,
+    'enabled': True,
+    'like_rate_per_second': 0,
+    'like_workers': 16,
+    'like_queue_size': 100000,
+    'config_check_interval': 3600,
+}
+
+
+def write_config(data_dir: str, **overrides):
+    with open(os.path.join(data_dir, 'plugin_config.json'), 'w', encoding='utf-8') as f:
+        json.dump({**BENCH_CONFIG, **overrides}, f)
+
+
+def generate_records(data_dir: str, users: int, snapshot_format: str = 'json'):
+    """在 PLATFORM/SELF_ID 的命名空间生成 users 人的记录
+
+    第 i 个用户（user_id = FIRST_USER + i）的记录在 i % 14 天前，超过 7 天的会被清理；
+    i % 14 == 0 的用户今天已点过赞。
+    """
+    if not users:
+        return
+    today = date.today().toordinal()
+    now = int(time.time())
+    records = {
+        str(FIRST_USER + i): record_format.LikeRecord(today - i % 14, 1 + i % 10, now)
+        for i in range(users)
+    }
+    shard_dir = os.path.join(data_dir, 'shards', f'{PLATFORM}_{SELF_ID}')
+    os.makedirs(shard_dir, exist_ok=True)
+    if snapshot_format == 'binary':
+        record_format.write_binary_snapshot(os.path.join(shard_dir, 'like_records.bin'), records)
+    else:
+        with open(os.path.join(shard_dir, 'like_records.json'), 'w', encoding='utf-8') as f:
+            json.dump(record_format.records_to_json(records), f)
+
+
+async def create_plugin(data_dir: str, client: FakeOneBotClient = None, wait_ready: bool = True):
+    """创建并初始化插件；wait_ready 时等待后台预加载和过期清理完成"""
+    instance = plugin_main.RandomLikesPlugin(FakeContext(data_dir, client))
+    await instance.initialize()
+    if wait_ready and instance._startup_task is not None:
+        await instance._startup_task
+    return instance
+
+
+def make_data_dir() -> str:
+    return tempfile.mkdtemp(prefix='likes-bench-')
+
+
+async def drain(handler):
+    """消费插件处理函数（异步生成器）产生的全部回复"""
+    return [result async for result in handler]
+
+
+def percentile(values: list, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def summarize(samples: list) -> dict:
+    """耗时样本（秒）的统计，单位毫秒"""
+    if not samples:
+        return {'count': 0, 'mean_ms': 0.0, 'p50_ms': 0.0, 'p99_ms': 0.0, 'max_ms': 0.0}
+    return {
+        'count': len(samples),
+        'mean_ms': sum(samples) / len(samples) * 1000,
+        'p50_ms': percentile(samples, 0.5) * 1000,
+        'p99_ms': percentile(samples, 0.99) * 1000,
+        'max_ms': max(samples) * 1000,
+    }
+
+
+class LoopLagMonitor:
+    """按固定间隔 sleep，记录实际唤醒比预期晚了多久"""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.samples = []
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.ensure_future(self._run())
+        return self
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, loop.time() - start - self.interval))
+
+    async def stop(self) -> dict:
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        return summarize(self.samples)
+
+
+def add_result_args(parser):
+    parser.add_argument('--output', help='结果保存路径（JSON），默认 benchmarks/results/<名称>-<时间>.json')
+    parser.add_argument('--no-save', action='store_true', help='不保存结果')
+    parser.add_argument('--baseline', help='与之比较的历史结果文件')
+
+
+def environment() -> dict:
+    return {
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'time': datetime.now().isoformat(timespec='seconds'),
+    }
+
+
+def save_results(name: str, args, results: dict):
+    """保存结果，并在指定 --baseline 时逐项打印与历史结果的比值"""
+    data = {'name': name, 'environment': environment(), 'results': results}
+    if not args.no_save:
+        path = args.output or os.path.join(RESULTS_DIR, f"{name}-{datetime.now():%Y%m%d-%H%M%S}.json")
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已保存: {path}")
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f).get('results', {})
+        print(f"\n与 {args.baseline} 比较（当前 / 基线）:")
+        for key, value, old in _paired(results, baseline):
+            ratio = value / old if old else (1.0 if not value else float('inf'))
+            print(f"  {key:<48} {old:>12.3f} -> {value:>12.3f}  x{ratio:.2f}")
+
+
+def _paired(current: dict, baseline: dict, prefix: str = ''):
+    for key, value in current.items():
+        old = baseline.get(key) if isinstance(baseline, dict) else None
+        if isinstance(value, dict):
+            yield from _paired(value, old or {}, f"{prefix}{key}.")
+        elif isinstance(value, (int, float)) and isinstance(old, (int, float)) and not isinstance(value, bool):
+            yield f"{prefix}{key}", value, old
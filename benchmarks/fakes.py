@@ -0,0 +1,141 @@
+"""离线压测用的 AstrBot Context、消息事件、平台适配器和 OneBot 客户端
+
+只实现插件实际用到的接口，不需要 QQ 账号或协议端。
+"""
+import asyncio
+import random
+
+
+class ActionFailed(Exception):
+    """模拟 aiocqhttp 的 ActionFailed，带 retcode"""
+
+    def __init__(self, retcode: int, message: str = ''):
+        super().__init__(f"ActionFailed(retcode={retcode}) {message}".strip())
+        self.retcode = retcode
+
+
+class NetworkError(Exception):
+    """模拟协议端断线，类名与 aiocqhttp 的 NetworkError 相同，会被归为暂时性错误"""
+
+
+class FakeOneBotClient:
+    """可配置延迟和错误注入的 OneBot v11 客户端
+
+    每次 send_like 先等待 latency ± jitter 秒，然后按概率抛出：
+    limit_rate -> retcode=1200（今日点赞已达上限），
+    fatal_rate -> retcode=100（非好友等），
+    network_rate -> NetworkError（会被重试并计入熔断）。
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, limit_rate: float = 0.0,
+                 fatal_rate: float = 0.0, network_rate: float = 0.0, friends=None, seed: int = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.limit_rate = limit_rate
+        self.fatal_rate = fatal_rate
+        self.network_rate = network_rate
+        # 好友 user_id 列表，None 表示 get_friend_list 返回空列表
+        self.friends = list(friends or [])
+        self.group_members = {}
+        self.random = random.Random(seed)
+        self.calls = 0
+        self.outcomes = {'ok': 0, 'limit': 0, 'fatal': 0, 'network': 0}
+
+    async def _delay(self):
+        delay = self.latency
+        if self.jitter:
+            delay = max(0.0, delay + self.random.uniform(-self.jitter, self.jitter))
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def send_like(self, user_id: int, times: int = 1):
+        self.calls += 1
+        await self._delay()
+        roll = self.random.random()
+        if roll < self.limit_rate:
+            self.outcomes['limit'] += 1
+            raise ActionFailed(1200, "点赞失败 今日同一好友点赞数已达上限")
+        roll -= self.limit_rate
+        if roll < self.fatal_rate:
+            self.outcomes['fatal'] += 1
+            raise ActionFailed(100, "不是好友")
+        roll -= self.fatal_rate
+        if roll < self.network_rate:
+            self.outcomes['network'] += 1
+            raise NetworkError("WebSocket API call failed")
+        self.outcomes['ok'] += 1
+        return None
+
+    async def get_friend_list(self):
+        await self._delay()
+        return [{'user_id': int(user_id), 'nickname': str(user_id)} for user_id in self.friends]
+
+    async def get_group_member_list(self, group_id: int):
+        await self._delay()
+        return [{'user_id': int(user_id)} for user_id in self.group_members.get(int(group_id), [])]
+
+    async def call_api(self, action: str, **params):
+        return await getattr(self, action)(**params)
+
+
+class FakePlatform:
+    """平台适配器，插件通过 platform.client 取得客户端"""
+
+    def __init__(self, client: FakeOneBotClient):
+        self.client = client
+
+
+class FakeContext:
+    """插件用到的 Context 接口；get_config() 返回 None，配置走插件的本地配置文件"""
+
+    def __init__(self, data_dir: str, client: FakeOneBotClient = None, admins=('10000',)):
+        self.data_dir = data_dir
+        self.platform = FakePlatform(client or FakeOneBotClient())
+        self.admins = [str(admin) for admin in admins]
+        self.sent = []
+
+    def get_config(self):
+        return None
+
+    def get_data_dir(self):
+        return self.data_dir
+
+    def get_platform(self, name):
+        return self.platform
+
+    def get_context_config(self):
+        return {'admins_id': self.admins}
+
+    async def send_message(self, origin, chain):
+        self.sent.append((origin, chain))
+
+
+class FakeEvent:
+    """AstrMessageEvent 的最小替身，plain_result() 直接返回文本"""
+
+    __slots__ = ('message_str', 'sender_id', 'platform_name', 'self_id', 'group_id', 'unified_msg_origin')
+
+    def __init__(self, text: str, sender_id: str, group_id: str = None,
+                 platform_name: str = 'aiocqhttp', self_id: str = '10000'):
+        self.message_str = text
+        self.sender_id = str(sender_id)
+        self.group_id = group_id
+        self.platform_name = platform_name
+        self.self_id = self_id
+        self.unified_msg_origin = f"{platform_name}:{'GroupMessage' if group_id else 'FriendMessage'}:" \
+                                  f"{group_id or sender_id}"
+
+    def get_sender_id(self):
+        return self.sender_id
+
+    def get_platform_name(self):
+        return self.platform_name
+
+    def get_self_id(self):
+        return self.self_id
+
+    def get_group_id(self):
+        return self.group_id
+
+    def plain_result(self, text: str):
+        return text
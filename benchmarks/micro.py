@@ -0,0 +1,112 @@
+"""插件热路径的微基准
+
+在不同规模的点赞记录下分别测量：
+- keyword_like：不含关键词的消息 / 今天已点过赞的用户 / 新用户（完整点赞流程）；
+- is_user_liked_today、record_user_like、like_stats；
+- clean_old_records（一次性清理约 6/14 的过期记录）。
+
+    python benchmarks/micro.py --sizes 1000 10000 100000 [--baseline results/xxx.json]
+"""
+import argparse
+import asyncio
+import logging
+import random
+import shutil
+import time
+
+import common
+from fakes import FakeEvent, FakeOneBotClient
+
+
+async def _timed(samples: list, coro):
+    start = time.perf_counter()
+    result = await coro
+    samples.append(time.perf_counter() - start)
+    return result
+
+
+async def _run_case(name: str, iterations: int, make_call) -> dict:
+    samples = []
+    start = time.perf_counter()
+    for i in range(iterations):
+        await _timed(samples, make_call(i))
+    elapsed = time.perf_counter() - start
+    result = common.summarize(samples)
+    result['ops_per_sec'] = iterations / elapsed if elapsed else 0.0
+    print(f"  {name:<26} {result['ops_per_sec']:>11.0f}/s  p50 {result['p50_ms'] * 1000:>8.1f}us  "
+          f"p99 {result['p99_ms'] * 1000:>8.1f}us")
+    return result
+
+
+async def bench_size(size: int, iterations: int, snapshot_format: str) -> dict:
+    data_dir = common.make_data_dir()
+    try:
+        # 关闭回复冷却，让每条消息都走完整的判断流程
+        common.write_config(data_dir, snapshot_format=snapshot_format,
+                            reply_cooldown_user=0, reply_cooldown_group=0)
+        common.generate_records(data_dir, size, snapshot_format)
+        plugin = await common.create_plugin(data_dir, FakeOneBotClient(), wait_ready=False)
+        # 分片加载时不清理过期记录，留给 clean_old_records 单独测量
+        plugin._startup_task.cancel()
+        plugin.like_store.retention_days = 14
+        await plugin.like_store.preload()
+        namespace = plugin.like_store.namespace(common.PLATFORM, common.SELF_ID)
+        rng = random.Random(size)
+        first, new_user = common.FIRST_USER, common.FIRST_USER + size
+        results = {}
+
+        def keyword(text: str, user_id: int):
+            return common.drain(plugin.keyword_like(FakeEvent(text, user_id, 'g1', self_id=common.SELF_ID)))
+
+        results['keyword_like_miss'] = await _run_case(
+            'keyword_like (无关键词)', iterations,
+            lambda i: keyword("今天天气不错", first + i % max(size, 1)))
+        # i % 14 == 0 的用户今天已点赞
+        liked_today = max(1, (size + 13) // 14) if size else 0
+        if liked_today:
+            results['keyword_like_liked'] = await _run_case(
+                'keyword_like (已点赞)', iterations,
+                lambda i: keyword("给我点赞", first + (i % liked_today) * 14))
+        results['keyword_like_new'] = await _run_case(
+            'keyword_like (新用户)', max(1, iterations // 10),
+            lambda i: keyword("给我点赞", new_user + i))
+        results['is_user_liked_today'] = await _run_case(
+            'is_user_liked_today', iterations,
+            lambda i: plugin.is_user_liked_today(str(first + rng.randrange(max(size, 1))), namespace))
+        new_user += iterations
+        results['record_user_like'] = await _run_case(
+            'record_user_like', iterations,
+            lambda i: plugin.record_user_like(str(new_user + i), 5, namespace))
+        results['like_stats'] = await _run_case(
+            'like_stats', max(1, iterations // 100),
+            lambda i: common.drain(plugin.like_stats(FakeEvent("/点赞统计", first, self_id=common.SELF_ID))))
+        results['clean_old_records'] = await _run_case(
+            'clean_old_records', 1, lambda i: plugin.clean_old_records())
+        await plugin.terminate()
+        return results
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+async def main_async(args) -> dict:
+    results = {}
+    for size in args.sizes:
+        print(f"\n记录数 {size} ({args.format}):")
+        results[str(size)] = await bench_size(size, args.iterations, args.format)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10_000, 100_000])
+    parser.add_argument('--iterations', type=int, default=5000)
+    parser.add_argument('--format', choices=('json', 'binary'), default='json')
+    common.add_result_args(parser)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    results = asyncio.run(main_async(args))
+    common.save_results('micro', args, {'format': args.format, 'iterations': args.iterations, **results})
+
+
+if __name__ == '__main__':
+    main()
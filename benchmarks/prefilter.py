@@ -0,0 +1,133 @@
+"""关键词预过滤的微基准
+
+按群聊的实际构成生成消息语料（短句、图片/表情码、链接、长段落、插件指令，约 1% 含“点赞”），
+逐条测量每条消息的平均耗时（纳秒）：
+- 原实现：lower() 复制后逐个 startswith/== 排除，再 any(keyword in text)；
+- TriggerMatcher：默认配置（单个中文关键词）和多关键词配置（正则 + IGNORECASE）；
+- keyword_like 对不含关键词的消息的完整处理耗时（含异步生成器和指标开销）。
+
+    python benchmarks/prefilter.py --messages 100000 --trigger-ratio 0.01
+"""
+import argparse
+import asyncio
+import logging
+import random
+import shutil
+import time
+
+import common
+from fakes import FakeEvent
+
+CHAT = [
+    "哈哈哈哈", "草", "？？？", "早上好", "晚安", "有人打游戏吗", "今天吃什么", "收到", "好的", "+1", "确实",
+    "笑死我了", "这个bug怎么修啊，昨天还好好的", "下班了下班了", "明天几点集合", "谁有这个资源", "666", "牛啊",
+    "绷不住了", "Hello everyone", "OK", "lol", "GG", "nice", "赞同楼上", "这波操作可以的", "我先去吃饭了",
+]
+MEDIA = [
+    "[图片]", "[表情]", "[语音]", "[CQ:face,id=178]", "[CQ:at,qq=123456] 来了吗",
+    "[CQ:image,file=3f2c1d0e9b8a7c6d5e4f.image,url=https://gchat.qpic.cn/gchatpic_new/0/0-0-3F2C1D0E/0]",
+]
+LINKS = [
+    "https://www.bilibili.com/video/BV1xx411c7mD 这个视频好好笑", "https://github.com/AstrBotDevs/AstrBot",
+    "分享链接 https://b23.tv/abcdEFG", "看看这个 https://mp.weixin.qq.com/s/AbCdEfGhIjKlMnOp",
+]
+COMMANDS = ["/help", "/点赞状态", "点赞统计", "/点赞指标", "/设置点赞范围 1 10", "/订阅点赞"]
+TRIGGERS = ["点赞", "给我点赞", "求点赞！", "点赞点赞点赞", "机器人给我点个赞 点赞", "今天也来点赞啦", "[CQ:at,qq=10000] 点赞"]
+
+# 多关键词配置：含英文关键词时走正则 + IGNORECASE
+MULTI_KEYWORDS = ("点赞", "赞我", "Like me")
+
+
+def build_corpus(args) -> list:
+    rng = random.Random(args.seed)
+    corpus = []
+    for _ in range(args.messages):
+        roll = rng.random()
+        if roll < args.trigger_ratio:
+            corpus.append(rng.choice(TRIGGERS))
+        elif roll < args.trigger_ratio + 0.005:
+            corpus.append(rng.choice(COMMANDS))
+        elif roll < 0.15:
+            corpus.append(rng.choice(MEDIA))
+        elif roll < 0.20:
+            corpus.append(rng.choice(LINKS))
+        elif roll < 0.25:
+            # 长段落
+            corpus.append("，".join(rng.choice(CHAT) for _ in range(rng.randint(5, 40))))
+        else:
+            corpus.append(rng.choice(CHAT))
+    return corpus
+
+
+def legacy_matches(text: str) -> bool:
+    """改造前 keyword_like 中的判断"""
+    message_text = text.lower()
+    if message_text.startswith('/点赞') or message_text == '点赞状态' or message_text == '点赞统计' or \
+       message_text.startswith('点赞状态') or message_text.startswith('点赞统计'):
+        return False
+    return any(keyword in message_text for keyword in ["点赞"])
+
+
+def time_per_message(func, corpus: list, repeat: int) -> tuple:
+    """取 repeat 次中最快的一次，返回 (每条消息纳秒数, 命中条数)"""
+    best = float('inf')
+    hits = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        hits = sum(1 for text in corpus if func(text))
+        best = min(best, time.perf_counter() - start)
+    return best / len(corpus) * 1e9, hits
+
+
+async def time_keyword_like(corpus: list, repeat: int) -> float:
+    """keyword_like 处理不含关键词的消息的每条耗时（纳秒）"""
+    data_dir = common.make_data_dir()
+    try:
+        common.write_config(data_dir)
+        plugin = await common.create_plugin(data_dir)
+        events = [FakeEvent(text, common.FIRST_USER, 'g1', self_id=common.SELF_ID) for text in corpus]
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for event in events:
+                async for _ in plugin.keyword_like(event):
+                    pass
+            best = min(best, time.perf_counter() - start)
+        await plugin.terminate()
+        return best / len(events) * 1e9
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', type=int, default=100_000)
+    parser.add_argument('--trigger-ratio', type=float, default=0.01, help='含“点赞”的消息比例')
+    parser.add_argument('--repeat', type=int, default=5, help='重复次数，取最快的一次')
+    parser.add_argument('--seed', type=int, default=1)
+    common.add_result_args(parser)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    corpus = build_corpus(args)
+    defaults = common.plugin_main.ConfigSnapshot.DEFAULTS
+    default_matcher = common.matcher.TriggerMatcher(defaults['trigger_keywords'], defaults['exclude_prefixes'])
+    multi_matcher = common.matcher.TriggerMatcher(MULTI_KEYWORDS, defaults['exclude_prefixes'])
+    print(f"语料 {len(corpus)} 条, 平均 {sum(map(len, corpus)) / len(corpus):.1f} 字")
+
+    results = {}
+    for name, func in (('legacy', legacy_matches), ('matcher_default', default_matcher.matches),
+                       ('matcher_multi', multi_matcher.matches)):
+        ns, hits = time_per_message(func, corpus, args.repeat)
+        results[name] = {'ns_per_message': ns, 'hits': hits}
+        print(f"  {name:<20} {ns:>8.0f} ns/条  命中 {hits}")
+    misses = [text for text in corpus if not default_matcher.matches(text)]
+    ns = asyncio.run(time_keyword_like(misses, args.repeat))
+    results['keyword_like_miss'] = {'ns_per_message': ns}
+    print(f"  {'keyword_like_miss':<20} {ns:>8.0f} ns/条")
+    common.save_results('prefilter', args, {'params': {'messages': args.messages, 'trigger_ratio': args.trigger_ratio},
+                                            **results})
+
+
+if __name__ == '__main__':
+    main()
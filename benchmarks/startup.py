@@ -0,0 +1,66 @@
+"""插件启动耗时基准
+
+在临时数据目录中生成指定人数的点赞记录，测量：
+- initialize() 的耗时（应与记录数量无关）；
+- 初始化后第一次查询“今天是否已点赞”的耗时（首次使用时加载分片）；
+- 后台启动任务（预加载记录，加载时清理过期记录）完成的耗时，以及期间事件循环的最大延迟。
+
+    python benchmarks/startup.py --users 10000 100000 1000000 --format json binary
+"""
+import argparse
+import asyncio
+import logging
+import shutil
+import time
+
+import common
+
+
+async def measure(data_dir: str) -> dict:
+    lag = common.LoopLagMonitor(0.01).start()
+
+    start = time.perf_counter()
+    plugin = await common.create_plugin(data_dir, wait_ready=False)
+    init_time = time.perf_counter() - start
+
+    namespace = plugin.like_store.namespace(common.PLATFORM, common.SELF_ID)
+    query_start = time.perf_counter()
+    await plugin.is_user_liked_today(str(common.FIRST_USER), namespace)
+    first_query = time.perf_counter() - query_start
+
+    await plugin._startup_task
+    ready_time = time.perf_counter() - start
+    lag_stats = await lag.stop()
+    await plugin.terminate()
+    return {'initialize_ms': init_time * 1000, 'first_query_ms': first_query * 1000,
+            'background_ms': ready_time * 1000, 'max_lag_ms': lag_stats['max_ms']}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--format', nargs='+', choices=('json', 'binary'), default=['json'])
+    common.add_result_args(parser)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    results = {}
+    print(f"{'users':>9} {'format':>7} {'initialize':>11} {'first query':>12} {'background':>11} {'max lag':>9}")
+    for users in args.users:
+        for snapshot_format in args.format:
+            data_dir = common.make_data_dir()
+            try:
+                common.write_config(data_dir, snapshot_format=snapshot_format)
+                common.generate_records(data_dir, users, snapshot_format)
+                result = asyncio.run(measure(data_dir))
+            finally:
+                shutil.rmtree(data_dir, ignore_errors=True)
+            results[f"{users}_{snapshot_format}"] = result
+            print(f"{users:>9} {snapshot_format:>7} {result['initialize_ms']:>9.1f}ms "
+                  f"{result['first_query_ms']:>10.1f}ms {result['background_ms']:>9.1f}ms "
+                  f"{result['max_lag_ms']:>7.1f}ms")
+    common.save_results('startup', args, results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+"""端到端消息风暴回放
+
+按给定速率（或尽可能快地）把大量群消息交给 keyword_like，模拟热门群里集中刷
+“点赞”的场景；OneBot 客户端带可配置的延迟和错误注入（包括 retcode=1200）。
+报告吞吐量、每条消息的处理耗时 p50/p99、事件循环延迟和各类回复的数量。
+
+    python benchmarks/storm.py --messages 20000 --users 2000 --latency 0.05 --limit-rate 0.1
+"""
+import argparse
+import asyncio
+import logging
+import random
+import shutil
+import time
+from collections import Counter
+
+import common
+from fakes import FakeEvent, FakeOneBotClient
+
+
+def classify_reply(replies: list) -> str:
+    if not replies:
+        return 'silent'
+    text = str(replies[0])
+    if text == common.plugin_main.ALREADY_LIKED_REPLY:
+        return 'already_liked'
+    if text == common.plugin_main.LIKE_FAILED_REPLY:
+        return 'failed'
+    if text.startswith('✨'):
+        return 'liked'
+    if '明天再来' in text:
+        return 'limit'
+    return 'other'
+
+
+def build_messages(args) -> list:
+    """(文本, user_id, 群号) 列表；用户按 Zipf 式分布，少数活跃用户反复刷屏"""
+    rng = random.Random(args.seed)
+    weights = [1 / (rank + 1) for rank in range(args.users)]
+    users = rng.choices(range(args.users), weights=weights, k=args.messages)
+    messages = []
+    for user in users:
+        text = "给我点赞" if rng.random() < args.keyword_ratio else "哈哈哈哈"
+        messages.append((text, common.FIRST_USER + user, f"g{user % args.groups}"))
+    return messages
+
+
+async def replay(args) -> dict:
+    data_dir = common.make_data_dir()
+    try:
+        common.write_config(data_dir, like_rate_per_second=args.like_rate, snapshot_format=args.format)
+        common.generate_records(data_dir, args.records, args.format)
+        client = FakeOneBotClient(latency=args.latency, jitter=args.latency / 2, limit_rate=args.limit_rate,
+                                  fatal_rate=args.fatal_rate, network_rate=args.network_rate, seed=args.seed)
+        plugin = await common.create_plugin(data_dir, client)
+        messages = build_messages(args)
+
+        latencies, trigger_latencies = [], []
+        replies = Counter()
+
+        async def handle(text: str, user_id: int, group_id: str):
+            start = time.perf_counter()
+            result = await common.drain(plugin.keyword_like(FakeEvent(text, user_id, group_id,
+                                                                      self_id=common.SELF_ID)))
+            elapsed = time.perf_counter() - start
+            latencies.append(elapsed)
+            if text != "哈哈哈哈":
+                trigger_latencies.append(elapsed)
+                replies[classify_reply(result)] += 1
+
+        lag = common.LoopLagMonitor().start()
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        tasks = []
+        for i, message in enumerate(messages):
+            tasks.append(asyncio.ensure_future(handle(*message)))
+            if args.rate > 0:
+                delay = start + (i + 1) / args.rate - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            elif i % 256 == 255:
+                await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+        elapsed = loop.time() - start
+        lag_stats = await lag.stop()
+
+        results = {
+            'messages': len(messages),
+            'elapsed_s': elapsed,
+            'throughput_per_s': len(messages) / elapsed if elapsed else 0.0,
+            'latency': common.summarize(latencies),
+            'trigger_latency': common.summarize(trigger_latencies),
+            'loop_lag': lag_stats,
+            'replies': dict(replies),
+            'send_like_calls': client.calls,
+            'client_outcomes': dict(client.outcomes),
+            'plugin_counters': plugin.metrics.snapshot()['counters'],
+        }
+        await plugin.terminate()
+        return results
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def report(results: dict):
+    latency, trigger, lag = results['latency'], results['trigger_latency'], results['loop_lag']
+    print(f"消息数        {results['messages']}  用时 {results['elapsed_s']:.2f}s  "
+          f"吞吐 {results['throughput_per_s']:.0f} 条/s")
+    print(f"处理耗时      p50 {latency['p50_ms']:.2f}ms  p99 {latency['p99_ms']:.2f}ms  "
+          f"最大 {latency['max_ms']:.2f}ms")
+    print(f"触发消息耗时  p50 {trigger['p50_ms']:.2f}ms  p99 {trigger['p99_ms']:.2f}ms  "
+          f"最大 {trigger['max_ms']:.2f}ms")
+    print(f"事件循环延迟  p50 {lag['p50_ms']:.2f}ms  p99 {lag['p99_ms']:.2f}ms  最大 {lag['max_ms']:.2f}ms")
+    print(f"回复          {results['replies']}")
+    print(f"send_like     {results['send_like_calls']} 次 {results['client_outcomes']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', type=int, default=20000)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--groups', type=int, default=20)
+    parser.add_argument('--keyword-ratio', type=float, default=0.3, help='含“点赞”关键词的消息比例')
+    parser.add_argument('--rate', type=float, default=0, help='每秒到达的消息数，0 为尽可能快')
+    parser.add_argument('--records', type=int, default=10000, help='预先存在的点赞记录数')
+    parser.add_argument('--format', choices=('json', 'binary'), default='json')
+    parser.add_argument('--like-rate', type=float, default=0, help='插件的 like_rate_per_second，0 为不限速')
+    parser.add_argument('--latency', type=float, default=0.05, help='send_like 的平均延迟（秒）')
+    parser.add_argument('--limit-rate', type=float, default=0.1, help='返回 retcode=1200 的概率')
+    parser.add_argument('--fatal-rate', type=float, default=0.02, help='返回非好友等错误的概率')
+    parser.add_argument('--network-rate', type=float, default=0.0, help='抛出 NetworkError 的概率')
+    parser.add_argument('--seed', type=int, default=1)
+    common.add_result_args(parser)
+    args = parser.parse_args()
+    # 注入的错误会产生大量 ERROR 日志
+    logging.disable(logging.ERROR)
+    results = asyncio.run(replay(args))
+    report(results)
+    common.save_results('storm', args, {'params': {key: value for key, value in vars(args).items()
+                                                   if key not in ('output', 'no_save', 'baseline')},
+                                        **results})
+
+
+if __name__ == '__main__':
+    main()
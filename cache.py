@@ -0,0 +1,67 @@
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """有界的 TTL 内存缓存
+
+    按写入顺序保存条目，超过 max_entries 时淘汰最早写入的条目；过期条目在
+    读取或写入时顺带清除。ttl <= 0 表示不缓存。hits/misses 统计 get() 的命中情况。
+    """
+
+    def __init__(self, ttl: float, max_entries: int = 4096):
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        # key -> (value, 过期时间)
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[1] > time.monotonic():
+                self.hits += 1
+                return entry[0]
+            del self._entries[key]
+        self.misses += 1
+        return default
+
+    def set(self, key, value=True, ttl: float = None):
+        """写入条目，ttl 为空时使用缓存的默认 ttl"""
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        now = time.monotonic()
+        self._entries[key] = (value, now + ttl)
+        self._entries.move_to_end(key)
+        self._evict(now)
+
+    def discard(self, key):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def _evict(self, now: float):
+        entries = self._entries
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+        # 最早写入的条目通常最先过期，从头部清理到第一个未过期的条目为止
+        while entries:
+            key, (_, expires_at) = next(iter(entries.items()))
+            if expires_at > now:
+                break
+            del entries[key]
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
@@ -0,0 +1,267 @@
+import asyncio
+import random
+import time
+
+from astrbot.api import logger
+
+from .persistence import AsyncFileIO
+from .record_format import LikeRecord
+
+
+class LikeCampaign:
+    """一次批量点赞任务的状态，保存在 campaigns.json 中，重启后继续执行"""
+
+    RUNNING = 'running'
+    DONE = 'done'
+    CANCELLED = 'cancelled'
+    EXPIRED = 'expired'
+
+    def __init__(self, campaign_id: str, namespace: str, platform: str, self_id: str, users: list,
+                 day: int, source: str = '', origin: str = None):
+        self.id = campaign_id
+        self.namespace = namespace
+        self.platform = platform
+        self.self_id = self_id
+        # 去重并保持原顺序
+        self.users = list(dict.fromkeys(str(user_id) for user_id in users))
+        self.day = day
+        # 任务来源（管理员指令 / 定时订阅），仅用于展示
+        self.source = source
+        # 完成后通知的会话（unified_msg_origin），定时任务为空
+        self.origin = origin
+        self.status = self.RUNNING
+        # 已提交的用户（记录已写入存储）
+        self.done = set()
+        self.liked = 0
+        self.skipped = 0
+        self.failed = 0
+        self.created_at = time.time()
+        self.finished_at = None
+
+    @property
+    def total(self) -> int:
+        return len(self.users)
+
+    def remaining(self) -> list:
+        return [user_id for user_id in self.users if user_id not in self.done]
+
+    def progress_text(self) -> str:
+        elapsed = (self.finished_at or time.time()) - self.created_at
+        return (f"#{self.id} [{self.status}] {self.source} {len(self.done)}/{self.total} "
+                f"(点赞 {self.liked}, 跳过 {self.skipped}, 失败 {self.failed}, 用时 {elapsed:.0f} 秒)")
+
+    def to_dict(self) -> dict:
+        return {
+            'id': self.id,
+            'namespace': self.namespace,
+            'platform': self.platform,
+            'self_id': self.self_id,
+            'users': self.users,
+            'day': self.day,
+            'source': self.source,
+            'origin': self.origin,
+            'status': self.status,
+            'done': sorted(self.done),
+            'liked': self.liked,
+            'skipped': self.skipped,
+            'failed': self.failed,
+            'created_at': self.created_at,
+            'finished_at': self.finished_at,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        campaign = cls(data['id'], data['namespace'], data['platform'], data.get('self_id'),
+                       data.get('users', []), data['day'], data.get('source', ''), data.get('origin'))
+        campaign.status = data.get('status', cls.RUNNING)
+        campaign.done = set(data.get('done', []))
+        campaign.liked = data.get('liked', 0)
+        campaign.skipped = data.get('skipped', 0)
+        campaign.failed = data.get('failed', 0)
+        campaign.created_at = data.get('created_at', campaign.created_at)
+        campaign.finished_at = data.get('finished_at')
+        return campaign
+
+
+class CampaignManager:
+    """批量点赞任务与每日订阅
+
+    每个任务由 workers 个 worker 并发执行，send_like 仍经过插件的调度队列限速；
+    已点过赞的用户直接跳过。点赞记录先在内存中累积，每 checkpoint_interval 秒
+    和任务结束时通过 set_many() 批量提交一次，同时保存进度，重启后从未提交的
+    用户继续（只继续当天的任务）。
+    """
+
+    # campaigns.json 中最多保留的已结束任务数
+    MAX_FINISHED = 20
+
+    def __init__(self, state_file: str, io: AsyncFileIO, store, like_func, notify=None,
+                 workers: int = 3, checkpoint_interval: float = 5.0):
+        self.state_file = state_file
+        self.io = io
+        # ShardedLikeRecordStore
+        self.store = store
+        # like_func(platform, self_id, user_id, count) -> 'liked' / 'limit' / 'failed'
+        self.like_func = like_func
+        # notify(campaign)：任务完成后的回调（协程函数）
+        self.notify = notify
+        self.workers = max(1, workers)
+        self.checkpoint_interval = checkpoint_interval
+        self.campaigns = {}
+        # 命名空间 -> {'platform', 'self_id', 'users': [...]}
+        self.subscribers = {}
+        self._tasks = {}
+
+    async def load(self, today: int):
+        """读取任务和订阅，继续当天未完成的任务"""
+        try:
+            state = await self.io.read_json(self.state_file, {}) or {}
+        except Exception as e:
+            logger.error(f"加载批量点赞任务失败: {e}")
+            return
+        self.subscribers = state.get('subscribers', {})
+        for data in state.get('campaigns', []):
+            try:
+                campaign = LikeCampaign.from_dict(data)
+            except (KeyError, TypeError) as e:
+                logger.warning(f"忽略无效的批量点赞任务: {e}")
+                continue
+            self.campaigns[campaign.id] = campaign
+            if campaign.status != LikeCampaign.RUNNING:
+                continue
+            if campaign.day != today:
+                campaign.status = LikeCampaign.EXPIRED
+                continue
+            logger.info(f"继续批量点赞任务 {campaign.progress_text()}")
+            self._launch(campaign)
+
+    def start(self, namespace: str, platform: str, self_id: str, users: list, day: int,
+              source: str = '', origin: str = None) -> LikeCampaign:
+        campaign_id = str(max((int(cid) for cid in self.campaigns), default=0) + 1)
+        campaign = LikeCampaign(campaign_id, namespace, platform, self_id, users, day, source, origin)
+        self.campaigns[campaign_id] = campaign
+        logger.info(f"开始批量点赞任务 #{campaign_id}: {campaign.total} 人 ({source})")
+        self._launch(campaign)
+        return campaign
+
+    def _launch(self, campaign: LikeCampaign):
+        task = asyncio.ensure_future(self._run(campaign))
+        self._tasks[campaign.id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(campaign.id, None))
+
+    def cancel(self, campaign_id: str) -> bool:
+        task = self._tasks.get(campaign_id)
+        if task is None:
+            return False
+        self.campaigns[campaign_id].status = LikeCampaign.CANCELLED
+        task.cancel()
+        return True
+
+    async def _run(self, campaign: LikeCampaign):
+        queue = asyncio.Queue()
+        for user_id in campaign.remaining():
+            queue.put_nowait(user_id)
+        # 尚未提交的点赞记录和已处理的用户
+        batch = {'records': {}, 'done': []}
+        workers = [asyncio.ensure_future(self._worker(campaign, queue, batch))
+                   for _ in range(min(self.workers, max(1, queue.qsize())))]
+        checkpoints = asyncio.ensure_future(self._checkpoint_loop(campaign, batch))
+        try:
+            await asyncio.gather(*workers)
+            campaign.status = LikeCampaign.DONE
+        except asyncio.CancelledError:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            raise
+        except Exception as e:
+            logger.error(f"批量点赞任务 #{campaign.id} 出错: {e}")
+            campaign.status = LikeCampaign.CANCELLED
+        finally:
+            checkpoints.cancel()
+            if campaign.status != LikeCampaign.RUNNING:
+                campaign.finished_at = time.time()
+            await self._commit(campaign, batch)
+        logger.info(f"批量点赞任务结束 {campaign.progress_text()}")
+        if self.notify is not None and campaign.status == LikeCampaign.DONE:
+            try:
+                await self.notify(campaign)
+            except Exception as e:
+                logger.warning(f"发送批量点赞任务通知失败: {e}")
+
+    async def _worker(self, campaign: LikeCampaign, queue: asyncio.Queue, batch: dict):
+        while True:
+            try:
+                user_id = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            if await self.store.is_liked_on(campaign.namespace, user_id, campaign.day):
+                campaign.skipped += 1
+            else:
+                likes = random.randint(1, 10)
+                result = await self.like_func(campaign.platform, campaign.self_id, user_id, likes)
+                if result == 'failed':
+                    campaign.failed += 1
+                else:
+                    # 达到上限同样记为已点赞，避免重复尝试
+                    batch['records'][user_id] = LikeRecord(campaign.day, likes, int(time.time()))
+                    campaign.liked += 1
+            batch['done'].append(user_id)
+
+    async def _checkpoint_loop(self, campaign: LikeCampaign, batch: dict):
+        while True:
+            await asyncio.sleep(self.checkpoint_interval)
+            await self._commit(campaign, batch)
+
+    async def _commit(self, campaign: LikeCampaign, batch: dict):
+        """批量提交累积的点赞记录，并保存进度"""
+        records, done = batch['records'], batch['done']
+        batch['records'], batch['done'] = {}, []
+        try:
+            if records:
+                await self.store.set_many(campaign.namespace, records)
+            campaign.done.update(done)
+            await self.save()
+        except Exception as e:
+            logger.error(f"提交批量点赞任务 #{campaign.id} 的进度失败: {e}")
+
+    def subscribe(self, namespace: str, platform: str, self_id: str, user_id: str) -> bool:
+        entry = self.subscribers.setdefault(namespace, {'platform': platform, 'self_id': self_id, 'users': []})
+        if user_id in entry['users']:
+            return False
+        entry['users'].append(user_id)
+        return True
+
+    def unsubscribe(self, namespace: str, user_id: str) -> bool:
+        entry = self.subscribers.get(namespace)
+        if entry is None or user_id not in entry['users']:
+            return False
+        entry['users'].remove(user_id)
+        return True
+
+    def start_subscriptions(self, day: int) -> list:
+        """为每个命名空间的订阅用户各启动一个任务"""
+        return [
+            self.start(namespace, entry['platform'], entry.get('self_id'), entry['users'], day, source='每日订阅')
+            for namespace, entry in self.subscribers.items() if entry.get('users')
+        ]
+
+    async def save(self):
+        finished = sorted((c for c in self.campaigns.values() if c.status != LikeCampaign.RUNNING),
+                          key=lambda c: int(c.id))
+        for campaign in finished[:-self.MAX_FINISHED]:
+            del self.campaigns[campaign.id]
+        state = {
+            'subscribers': self.subscribers,
+            'campaigns': [campaign.to_dict() for campaign in self.campaigns.values()],
+        }
+        await self.io.write_json(self.state_file, state)
+
+    async def close(self):
+        """停止运行中的任务（保持 running 状态，下次启动时继续）"""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        await self.save()
@@ -0,0 +1,53 @@
+from .matcher import TriggerMatcher
+
+
+class ConfigSnapshot:
+    """插件配置的内存快照
+
+    消息处理热路径只读取这里的属性，不访问磁盘；快照在写配置和定期检查配置时
+    原地更新，关键词和排除前缀不变时沿用已编译的匹配器。
+    """
+
+    # 快照覆盖的配置项及其默认值
+    DEFAULTS = {
+        "enabled": True,
+        "min_likes": 1,
+        "max_likes": 10,
+        # 消息中包含任一关键词即触发点赞
+        "trigger_keywords": ("点赞",),
+        # 以这些前缀开头的消息（插件自身的指令）不触发点赞
+        "exclude_prefixes": ("/点赞", "点赞状态", "点赞统计", "点赞指标", "点赞任务", "/批量点赞", "批量点赞",
+                             "/订阅点赞", "订阅点赞", "/取消", "取消订阅点赞", "取消点赞任务"),
+        # “今天已经点过赞”回复的冷却时间（秒）：同一用户 / 同一群内不重复回复
+        "reply_cooldown_user": 60,
+        "reply_cooldown_group": 10,
+        # 输出每次点赞的详细日志；关闭时热路径不格式化这些日志
+        "debug_log": False,
+    }
+
+    def __init__(self, values: dict = None):
+        self.enabled = self.DEFAULTS["enabled"]
+        self.min_likes = self.DEFAULTS["min_likes"]
+        self.max_likes = self.DEFAULTS["max_likes"]
+        self.trigger_keywords = self.DEFAULTS["trigger_keywords"]
+        self.exclude_prefixes = self.DEFAULTS["exclude_prefixes"]
+        self.reply_cooldown_user = self.DEFAULTS["reply_cooldown_user"]
+        self.reply_cooldown_group = self.DEFAULTS["reply_cooldown_group"]
+        self.debug_log = self.DEFAULTS["debug_log"]
+        self.matcher = TriggerMatcher(self.trigger_keywords, self.exclude_prefixes)
+        # 生成快照时本地配置文件的 mtime，用于判断是否需要重新读取
+        self.mtime = None
+        if values:
+            self.update(values)
+
+    def update(self, values: dict):
+        """合并新的配置值，忽略快照不关心的键"""
+        rebuild_matcher = False
+        for key, value in values.items():
+            if key in self.DEFAULTS and value is not None:
+                if key in ("trigger_keywords", "exclude_prefixes"):
+                    value = (value,) if isinstance(value, str) else tuple(str(v) for v in value)
+                    rebuild_matcher = rebuild_matcher or value != getattr(self, key)
+                setattr(self, key, value)
+        if rebuild_matcher:
+            self.matcher = TriggerMatcher(self.trigger_keywords, self.exclude_prefixes)
@@ -0,0 +1,263 @@
+import asyncio
+import time
+
+from astrbot.api import logger
+
+
+class TokenBucket:
+    """令牌桶限速器，rate 为每秒补充的令牌数，capacity 为允许的突发量"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """取得一个令牌，必要时等待补充（rate <= 0 表示不限速）"""
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class DispatchStats:
+    """调度队列的运行指标"""
+
+    def __init__(self):
+        self.submitted = 0
+        self.coalesced = 0
+        self.completed = 0
+        self.failed = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+    def record(self, wait: float, latency: float, ok: bool):
+        if ok:
+            self.completed += 1
+        else:
+            self.failed += 1
+        self.wait_total += wait
+        self.wait_max = max(self.wait_max, wait)
+        self.latency_total += latency
+        self.latency_max = max(self.latency_max, latency)
+
+    def as_dict(self) -> dict:
+        finished = self.completed + self.failed
+        return {
+            'submitted': self.submitted,
+            'coalesced': self.coalesced,
+            'completed': self.completed,
+            'failed': self.failed,
+            'wait_avg_ms': self.wait_total / finished * 1000 if finished else 0.0,
+            'wait_max_ms': self.wait_max * 1000,
+            'latency_avg_ms': self.latency_total / finished * 1000 if finished else 0.0,
+            'latency_max_ms': self.latency_max * 1000,
+        }
+
+
+class LikeDispatcher:
+    """send_like 调度队列
+
+    所有点赞请求进入同一个有界队列，由固定数量的 worker 在令牌桶限速下执行；
+    同一个 key（平台 + 用户）在合并窗口内的重复请求共享同一个结果。
+    """
+
+    def __init__(self, rate: float = 2.0, burst: int = 5, workers: int = 3,
+                 coalesce_window: float = 10.0, max_queue: int = 500):
+        # 是否输出每次调用的排队/耗时日志
+        self.verbose = False
+        self.bucket = TokenBucket(rate, burst)
+        self.workers = max(1, workers)
+        self.coalesce_window = coalesce_window
+        self.stats = DispatchStats()
+        self._queue = asyncio.Queue(maxsize=max_queue)
+        # key -> (future, 提交时间)
+        self._recent = {}
+        self._worker_tasks = []
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def _ensure_workers(self):
+        if self._worker_tasks:
+            return
+        loop = asyncio.get_running_loop()
+        self._worker_tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def submit(self, key, call):
+        """排队执行 call()（返回协程的无参函数），等待并返回其结果或异常"""
+        self._ensure_workers()
+        now = time.monotonic()
+        recent = self._recent.get(key)
+        if recent is not None and now - recent[1] < self.coalesce_window:
+            self.stats.coalesced += 1
+            return await asyncio.shield(recent[0])
+
+        future = asyncio.get_running_loop().create_future()
+        # 调用方被取消后没有人等待结果，这里取走异常，避免 "exception was never retrieved"
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        # 队列已满时 QueueFull 直接抛给调用方
+        self._queue.put_nowait((call, future, now))
+        self.stats.submitted += 1
+        self._recent[key] = (future, now)
+        self._prune_recent(now)
+        return await asyncio.shield(future)
+
+    def _prune_recent(self, now: float):
+        if len(self._recent) < 1024:
+            return
+        self._recent = {
+            key: item for key, item in self._recent.items()
+            if now - item[1] < self.coalesce_window or not item[0].done()
+        }
+
+    async def _worker(self):
+        while True:
+            call, future, enqueued_at = await self._queue.get()
+            try:
+                await self.bucket.acquire()
+                started = time.monotonic()
+                ok = False
+                try:
+                    result = await call()
+                    ok = True
+                    if not future.done():
+                        future.set_result(result)
+                except Exception as e:
+                    if not future.done():
+                        future.set_exception(e)
+                finally:
+                    finished = time.monotonic()
+                    self.stats.record(started - enqueued_at, finished - started, ok)
+                    if self.verbose:
+                        logger.debug(
+                            f"send_like 队列: 等待 {(started - enqueued_at) * 1000:.1f}ms, "
+                            f"耗时 {(finished - started) * 1000:.1f}ms, 剩余 {self._queue.qsize()}"
+                        )
+            except asyncio.CancelledError:
+                if not future.done():
+                    future.cancel()
+                raise
+            finally:
+                self._queue.task_done()
+
+    def snapshot(self) -> dict:
+        """队列深度与等待/调用耗时指标"""
+        data = self.stats.as_dict()
+        data['queue_depth'] = self.queue_depth
+        return data
+
+    async def close(self):
+        """停止 worker，并取消仍在排队的请求"""
+        for task in self._worker_tasks:
+            task.cancel()
+        if self._worker_tasks:
+            await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        while not self._queue.empty():
+            _, future, _ = self._queue.get_nowait()
+            if not future.done():
+                future.cancel()
+
+
+# 支持 send_like 的平台（小写）
+LIKE_PLATFORMS = frozenset(['qq', 'aiocqhttp', 'onebot'])
+
+
+class _ResolvedSender:
+    __slots__ = ('platform', 'client', 'send', 'checked_at')
+
+    def __init__(self, platform, client, send, checked_at: float):
+        self.platform = platform
+        self.client = client
+        self.send = send
+        self.checked_at = checked_at
+
+
+class LikeSenderResolver:
+    """按平台缓存点赞调用函数
+
+    首次遇到某个平台时探测适配器和客户端支持的 API，生成 send(user_id, times)
+    并缓存；之后只做一次字典查找。超过 revalidate_interval 秒，或者调用出错被
+    invalidate() 后，会重新获取适配器，适配器或客户端实例变化时重建调用函数。
+    """
+
+    def __init__(self, context, revalidate_interval: float = 60.0):
+        self.context = context
+        self.revalidate_interval = revalidate_interval
+        self._cache = {}
+
+    def resolve(self, platform_name: str):
+        """返回该平台的 send(user_id, times) 协程函数，不支持时返回 None"""
+        entry = self._cache.get(platform_name)
+        now = time.monotonic()
+        if entry is not None and now - entry.checked_at < self.revalidate_interval:
+            return entry.send
+        entry = self._build(platform_name, entry, now)
+        self._cache[platform_name] = entry
+        return entry.send
+
+    def client(self, platform_name: str):
+        """该平台已解析的客户端对象，尚未解析或不支持时返回 None"""
+        entry = self._cache.get(platform_name)
+        return entry.client if entry is not None else None
+
+    def invalidate(self, platform_name: str = None):
+        """丢弃缓存（平台重连或调用出错时使用）"""
+        if platform_name is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(platform_name, None)
+
+    def _build(self, platform_name: str, previous, now: float) -> _ResolvedSender:
+        # 只有QQ平台才支持点赞功能
+        if platform_name.lower() not in LIKE_PLATFORMS:
+            logger.info(f"平台 {platform_name} 不支持点赞功能")
+            return _ResolvedSender(None, None, None, float('inf'))
+
+        platform = self.context.get_platform(platform_name)
+        if not platform:
+            logger.warning(f"无法获取平台适配器: {platform_name}")
+            return _ResolvedSender(None, None, None, now)
+
+        # 尝试获取原始客户端对象
+        client = getattr(platform, 'client', None) or getattr(platform, 'bot', None)
+        if client is None:
+            logger.warning("无法获取平台客户端对象")
+            return _ResolvedSender(platform, None, None, now)
+
+        if previous is not None and previous.platform is platform and previous.client is client:
+            # 适配器和客户端都没变，沿用已有的调用函数
+            previous.checked_at = now
+            return previous
+
+        if hasattr(client, 'send_like'):
+            # OneBot v11 标准的点赞API
+            send_like = client.send_like
+
+            async def send(user_id: int, times: int):
+                return await send_like(user_id=user_id, times=times)
+        elif hasattr(client, 'call_api'):
+            # 通用API调用方式
+            call_api = client.call_api
+
+            async def send(user_id: int, times: int):
+                return await call_api('send_like', user_id=user_id, times=times)
+        else:
+            logger.warning("客户端不支持点赞API")
+            send = None
+        if send is not None:
+            logger.debug(f"已缓存平台 {platform_name} 的点赞调用")
+        return _ResolvedSender(platform, client, send, now)
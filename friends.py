@@ -0,0 +1,123 @@
+import asyncio
+import time
+
+from astrbot.api import logger
+
+from .cache import TTLCache
+
+
+async def fetch_friend_list(client) -> list:
+    """通过 OneBot get_friend_list 获取好友列表"""
+    if hasattr(client, 'get_friend_list'):
+        result = await client.get_friend_list()
+    elif hasattr(client, 'call_api'):
+        result = await client.call_api('get_friend_list')
+    else:
+        raise RuntimeError("客户端不支持 get_friend_list")
+    # 部分实现返回完整响应 {'data': [...]}
+    if isinstance(result, dict):
+        result = result.get('data') or []
+    return result or []
+
+
+async def fetch_group_member_list(client, group_id) -> list:
+    """通过 OneBot get_group_member_list 获取群成员列表"""
+    if hasattr(client, 'get_group_member_list'):
+        result = await client.get_group_member_list(group_id=int(group_id))
+    elif hasattr(client, 'call_api'):
+        result = await client.call_api('get_group_member_list', group_id=int(group_id))
+    else:
+        raise RuntimeError("客户端不支持 get_group_member_list")
+    if isinstance(result, dict):
+        result = result.get('data') or []
+    return result or []
+
+
+class FriendListCache:
+    """按平台缓存机器人的好友列表，用于在调用 send_like 之前排除非好友
+
+    好友列表在首次查询及超过 refresh_interval 秒后于后台刷新，刷新期间沿用旧列表；
+    列表未加载时不做判断。收到好友添加通知时即时加入。点赞失败的用户另外记入
+    negative_ttl 秒的负缓存，期间直接判定为无法点赞。
+    """
+
+    def __init__(self, enabled: bool = False, refresh_interval: float = 600.0,
+                 negative_ttl: float = 3600.0, max_entries: int = 4096):
+        self.enabled = enabled
+        self.refresh_interval = refresh_interval
+        # 平台 -> 好友 user_id 集合
+        self._friends = {}
+        # 平台 -> 上次开始刷新的时间
+        self._refreshed_at = {}
+        self._refresh_tasks = {}
+        # (平台, user_id) -> True，点赞失败的用户
+        self.negative = TTLCache(negative_ttl, max_entries)
+        # 在本地判定为无法点赞、跳过 send_like 的次数
+        self.skipped = 0
+
+    def may_like(self, platform: str, user_id: str, client=None) -> bool:
+        """本地判断能否为用户点赞，无法确定时返回 True"""
+        if not self.enabled:
+            return True
+        if self.negative.get((platform, user_id)):
+            self.skipped += 1
+            return False
+        if client is not None:
+            self._maybe_refresh(platform, client)
+        friends = self._friends.get(platform)
+        if friends is None or user_id in friends:
+            return True
+        self.skipped += 1
+        return False
+
+    def _maybe_refresh(self, platform: str, client):
+        refreshed_at = self._refreshed_at.get(platform)
+        if refreshed_at is not None and time.monotonic() - refreshed_at < self.refresh_interval:
+            return
+        if platform in self._refresh_tasks:
+            return
+        task = asyncio.ensure_future(self.refresh(platform, client))
+        self._refresh_tasks[platform] = task
+        task.add_done_callback(lambda _: self._refresh_tasks.pop(platform, None))
+
+    async def refresh(self, platform: str, client):
+        # 失败时同样等到下一个刷新周期再重试
+        self._refreshed_at[platform] = time.monotonic()
+        try:
+            friends = await fetch_friend_list(client)
+        except Exception as e:
+            logger.warning(f"获取平台 {platform} 的好友列表失败: {e}")
+            return
+        self._friends[platform] = {
+            str(friend['user_id']) for friend in friends
+            if isinstance(friend, dict) and 'user_id' in friend
+        }
+        logger.debug(f"已刷新平台 {platform} 的好友列表: {len(self._friends[platform])} 人")
+
+    def add_friend(self, platform: str, user_id: str):
+        """好友添加通知"""
+        friends = self._friends.get(platform)
+        if friends is not None:
+            friends.add(user_id)
+        self.negative.discard((platform, user_id))
+
+    def mark_failed(self, platform: str, user_id: str):
+        """点赞失败（非次数上限）后，在 negative_ttl 内不再尝试"""
+        if self.enabled:
+            self.negative.set((platform, user_id))
+
+    def stats(self) -> dict:
+        return {
+            'platforms': len(self._friends),
+            'friends': sum(len(friends) for friends in self._friends.values()),
+            'skipped': self.skipped,
+            'negative': self.negative.stats(),
+        }
+
+    async def close(self):
+        tasks = list(self._refresh_tasks.values())
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
@@ -1,10 +1,73 @@
-from astrbot.api.event import filter, AstrMessageEvent, MessageEventResult
+from astrbot.api.event import filter, AstrMessageEvent, MessageChain, MessageEventResult
 from astrbot.api.star import Context, Star, register
 from astrbot.api import logger
+import asyncio
 import random
 import json
 import os
-from datetime import datetime, date
+import time
+from datetime import datetime, date, timedelta
+
+from .cache import TTLCache
+from .campaigns import CampaignManager
+from .config_cache import ConfigSnapshot
+from .dispatch import LikeDispatcher, LikeSenderResolver
+from .friends import FriendListCache, fetch_group_member_list
+from .metrics import PluginMetrics
+from .resilience import CircuitOpenError, LikeCallGuard, LikeErrorClassifier
+from .persistence import AsyncFileIO, atomic_write_json, atomic_write_text
+from .record_format import LikeRecord
+from .records import (
+    LikeRecordBackend, LikeRecordStore, JournalLikeRecordStore, SharedLikeRecordStore, SqliteLikeRecordStore
+)
+from .shards import ShardedLikeRecordStore
+
+# 今天已经点过赞时的回复，受回复冷却限制
+ALREADY_LIKED_REPLY = "今天已经给你点过赞了哦，明天再来吧~"
+LIKE_FAILED_REPLY = "❌ 点赞失败，可能是平台不支持或需要添加好友"
+
+# 初始化时读取的配置项及其默认值，与配置快照的配置项一起一次读取
+STARTUP_CONFIG = {
+    "config_check_interval": 5,
+    "like_rate_per_second": 2,
+    "like_burst": 5,
+    "like_workers": 3,
+    "like_coalesce_seconds": 10,
+    "like_queue_size": 500,
+    "storage_mode": "json",
+    "snapshot_format": "json",
+    "journal_compact_bytes": 1024 * 1024,
+    "shard_records": True,
+    "shard_partitions": 1,
+    "preload_records": True,
+    "like_retry_attempts": 3,
+    "like_retry_base_delay": 0.5,
+    "like_retry_max_delay": 5,
+    "like_timeout_seconds": 10,
+    "like_breaker_threshold": 5,
+    "like_breaker_reset_seconds": 30,
+    "reply_cooldown_max_entries": 4096,
+    "friend_check": False,
+    "friend_list_refresh_seconds": 600,
+    "friend_negative_ttl": 3600,
+    "campaign_workers": 3,
+    "campaign_checkpoint_seconds": 5,
+    "subscriber_like_time": "08:00",
+    "metrics_dump_interval": 0,
+    "admin_cache_ttl": 60,
+}
+# 缺失时需要写入配置文件的默认配置
+REQUIRED_CONFIG = ("min_likes", "max_likes", "enabled")
+
+# 配置检查间隔的下限（秒），避免配置为 0 时检查任务空转
+MIN_CONFIG_CHECK_INTERVAL = 1.0
+
+# 每条消息都要经过关键词匹配，只对其中 1/PREFILTER_SAMPLE 计时，避免计时本身比匹配还贵
+PREFILTER_SAMPLE = 64
+
+# AstrBot 全局配置中可能存放管理员列表的键，按顺序取第一个非空的
+ADMIN_CONFIG_KEYS = ('admins', 'admin_ids', 'admins_id', 'administrators', 'admin_list', 'admin_users', 'superusers')
+
 
 @register("astrbot_plugin_random_likes", "--sora--", "智能检测点赞关键词并自动随机点赞数", "1.0", "https://github.com/sora-yyds/astrbot_plugin_random_likes")
 class RandomLikesPlugin(Star):
@@ -21,7 +84,7 @@ class RandomLikesPlugin(Star):
             else:
                 # 基于当前工作目录查找data目录
                 current_dir = os.getcwd()
-                logger.info(f"当前工作目录: {current_dir}")
+                logger.debug(f"当前工作目录: {current_dir}")
                 
                 # 尝试常见的data目录路径
                 possible_data_paths = [
@@ -52,7 +115,7 @@ class RandomLikesPlugin(Star):
         try:
             os.makedirs(plugin_data_dir, exist_ok=True)
             logger.info(f"插件数据目录: {plugin_data_dir}")
-            logger.info(f"目录是否存在: {os.path.exists(plugin_data_dir)}")
+            logger.debug(f"目录是否存在: {os.path.exists(plugin_data_dir)}")
         except Exception as e:
             logger.error(f"创建插件数据目录失败: {e}")
         
@@ -60,40 +123,143 @@ class RandomLikesPlugin(Star):
         self.like_records_file = os.path.join(plugin_data_dir, 'like_records.json')
         # 本地配置文件路径（备用）
         self.local_config_file = os.path.join(plugin_data_dir, 'plugin_config.json')
+        # 批量点赞任务和每日订阅
+        self.campaigns_file = os.path.join(plugin_data_dir, 'campaigns.json')
+        # Prometheus 文本格式的指标文件（metrics_dump_interval > 0 时定期写出）
+        self.metrics_file = os.path.join(plugin_data_dir, 'metrics.prom')
+        
+        # 阻塞的文件操作统一放到专用线程池执行，避免卡住 AstrBot 的事件循环
+        self.file_io = AsyncFileIO()
+        
+        # 点赞记录存储，按 (平台, 机器人账号) 分片，在 initialize() 中按配置重建并加载
+        self.like_store = ShardedLikeRecordStore(
+            self.like_records_file, self.file_io, lambda path: LikeRecordStore(path, self.file_io), enabled=False
+        )
         
         # 配置是否可用的标志
         self.config_available = False
+        
+        # 配置的内存快照，消息处理时只读它，不访问磁盘
+        self.config_snapshot = ConfigSnapshot()
+        self._config_watch_task = None
+        self._startup_task = None
+        # 上次读取的本地配置文件 (mtime, 内容)，mtime 不变时不再重新解析
+        self._local_config_cache = None
+        
+        # 当前日序号（date.toordinal()），由零点切换任务更新，热路径不再格式化日期字符串
+        self.current_day = date.today().toordinal()
+        self._rollover_task = None
+        
+        # send_like 调度队列（限速 + 合并重复请求），在 initialize() 中按配置重建
+        self.like_dispatcher = LikeDispatcher()
+        
+        # 按平台缓存的点赞调用函数，避免每次点赞都反射探测适配器
+        self.like_resolver = LikeSenderResolver(self.context)
+        
+        # send_like 的超时、重试和按平台熔断；guard.classifier 可替换为自定义的错误分类
+        self.like_guard = LikeCallGuard()
+        
+        # 好友列表缓存（可选），非好友直接本地回复，不调用 send_like
+        self.friend_cache = FriendListCache()
+        
+        # 批量点赞任务，在 initialize() 中加载并继续未完成的任务
+        self.campaigns = CampaignManager(self.campaigns_file, self.file_io, self.like_store,
+                                         self._campaign_like, self._notify_campaign)
+        self._schedule_task = None
+        
+        # 管理员 ID 集合的缓存：(集合, 过期时间, 解析时的全局配置对象)
+        self.admin_cache_ttl = 60.0
+        self._admin_cache = (frozenset(), 0.0, None)
+        
+        # 各阶段耗时和点赞结果计数，由 /点赞指标 查看
+        self.metrics = PluginMetrics()
+        self._metrics_task = None
+        # 经过关键词匹配的消息数，用于 prefilter 抽样计时
+        self._prefilter_seen = 0
+        
+        # 进行中的点赞任务（(命名空间, user_id) -> Task），保证同一用户同时只有一次点赞
+        self._inflight_likes = {}
+        
+        # 回复冷却：冷却期内同一用户的重复触发直接忽略（不查记录、不回复），
+        # 同一群内的“今天已经点过赞”回复也合并为一条
+        self.user_reply_cooldown = TTLCache(ConfigSnapshot.DEFAULTS["reply_cooldown_user"])
+        self.group_reply_cooldown = TTLCache(ConfigSnapshot.DEFAULTS["reply_cooldown_group"])
 
     async def initialize(self):
-        """插件初始化方法，设置默认配置"""
+        """插件初始化方法
+
+        只读取一次配置并创建各组件；补写默认配置和预加载点赞记录都放到后台任务中，
+        初始化耗时与记录数量无关。分片加载时自行清理过期记录。
+        """
         try:
-            logger.info("开始初始化随机点赞插件")
+            logger.debug("开始初始化随机点赞插件")
 
             # 检查配置系统是否可用
             self.config_available = self._test_config_system()
-            logger.info(f"AstrBot配置系统可用: {self.config_available}")
-            
             if not self.config_available:
                 logger.warning("插件配置系统不可用，使用本地配置文件")
             
-            default_config = {
-                "min_likes": 1,
-                "max_likes": 10,
-                "enabled": True
-            }
+            # 快照和启动所需的配置项一次读取，缺失的默认配置稍后在后台合并写入
+            config, missing, mtime = await self.file_io.run(self.local_config_file, self._read_startup_config)
+            snapshot = ConfigSnapshot(config)
+            snapshot.mtime = mtime
+            self.config_snapshot = snapshot
+            check_interval = max(float(config["config_check_interval"]), MIN_CONFIG_CHECK_INTERVAL)
+            self._config_watch_task = asyncio.create_task(self._watch_config(check_interval))
+            
+            self.like_dispatcher = LikeDispatcher(
+                rate=float(config["like_rate_per_second"]),
+                burst=int(config["like_burst"]),
+                workers=int(config["like_workers"]),
+                coalesce_window=float(config["like_coalesce_seconds"]),
+                max_queue=int(config["like_queue_size"])
+            )
+            self.like_dispatcher.verbose = snapshot.debug_log
+            
+            # 按配置选择记录存储方式；这里只扫描已有分片，记录在首次使用或后台预加载时读取
+            self.like_store = self._create_like_store(config)
+            await self.like_store.load()
             
-            logger.info(f"默认配置: {default_config}")
+            self.like_guard = LikeCallGuard(
+                classifier=self.like_guard.classifier,
+                attempts=int(config["like_retry_attempts"]),
+                base_delay=float(config["like_retry_base_delay"]),
+                max_delay=float(config["like_retry_max_delay"]),
+                timeout=float(config["like_timeout_seconds"]),
+                failure_threshold=int(config["like_breaker_threshold"]),
+                reset_timeout=float(config["like_breaker_reset_seconds"])
+            )
             
-            # 使用安全的配置方法设置默认值
-            for key, value in default_config.items():
-                current_value = self.get_config_value(key)
-                logger.info(f"检查配置项 {key}: 当前值={current_value}, 默认值={value}")
-                if current_value is None:
-                    logger.info(f"设置默认配置: {key} = {value}")
-                    self.set_config_value(key, value)
+            cooldown_entries = int(config["reply_cooldown_max_entries"])
+            self.user_reply_cooldown = TTLCache(self.config_snapshot.reply_cooldown_user, cooldown_entries)
+            self.group_reply_cooldown = TTLCache(self.config_snapshot.reply_cooldown_group, cooldown_entries)
             
-            # 清理过期的点赞记录
-            self.clean_old_records()
+            self.friend_cache = FriendListCache(
+                enabled=bool(config["friend_check"]),
+                refresh_interval=float(config["friend_list_refresh_seconds"]),
+                negative_ttl=float(config["friend_negative_ttl"]),
+                max_entries=cooldown_entries
+            )
+            
+            # 过期记录在分片加载时和每天零点的切换任务中清理
+            self._rollover_task = asyncio.create_task(self._day_rollover())
+            self._startup_task = asyncio.create_task(
+                self._startup_jobs(missing, bool(config["preload_records"]))
+            )
+            
+            self.campaigns = CampaignManager(
+                self.campaigns_file, self.file_io, self.like_store, self._campaign_like, self._notify_campaign,
+                workers=int(config["campaign_workers"]),
+                checkpoint_interval=float(config["campaign_checkpoint_seconds"])
+            )
+            await self.campaigns.load(self.current_day)
+            subscriber_time = str(config["subscriber_like_time"] or "")
+            if subscriber_time:
+                self._schedule_task = asyncio.create_task(self._subscription_schedule(subscriber_time))
+            self.admin_cache_ttl = float(config["admin_cache_ttl"])
+            dump_interval = float(config["metrics_dump_interval"])
+            if dump_interval > 0:
+                self._metrics_task = asyncio.create_task(self._dump_metrics(dump_interval))
             
             logger.info("随机点赞插件初始化完成")
             
@@ -101,6 +267,17 @@ class RandomLikesPlugin(Star):
             logger.error(f"插件初始化失败: {e}")
             logger.warning("使用默认配置运行插件")
     
+    async def _startup_jobs(self, missing: dict, preload: bool):
+        """启动后的后台任务：补写缺失的默认配置，按配置预加载点赞记录（加载时清理过期记录）"""
+        try:
+            if missing:
+                logger.info(f"设置默认配置: {missing}")
+                await self.set_config_values_async(missing)
+            if preload:
+                await self.like_store.preload()
+        except Exception as e:
+            logger.error(f"插件启动任务失败: {e}")
+    
     @filter.command("设置点赞范围")
     async def set_range(self, event: AstrMessageEvent):
         """设置点赞数量范围 /设置点赞范围 最小值 最大值 (仅管理员)"""
@@ -132,11 +309,10 @@ class RandomLikesPlugin(Star):
                 yield event.plain_result("❌ 最大值不能超过20")
                 return
             
-            # 使用安全的配置设置方法
-            success1 = self.set_config_value("min_likes", min_val)
-            success2 = self.set_config_value("max_likes", max_val)
+            # 两个值一起写入，任一配置后端失败时整体回滚
+            success = await self.set_config_values_async({"min_likes": min_val, "max_likes": max_val})
             
-            if success1 and success2:
+            if success:
                 yield event.plain_result(f"✅ 已设置点赞范围: {min_val} - {max_val}")
             else:
                 yield event.plain_result("❌ 设置失败，配置保存出错")
@@ -152,18 +328,18 @@ class RandomLikesPlugin(Star):
     @filter.event_message_type(filter.EventMessageType.ALL)
     async def keyword_like(self, event: AstrMessageEvent):
         """关键词触发快速点赞"""
-        if not self.get_config_value("enabled", True):
+        if not self.config_snapshot.enabled:
             return
         
-        # 检查消息中是否包含点赞相关关键词
-        message_text = event.message_str.lower()
-        
-        # 排除命令消息 - 包括带/的命令和私聊中不带/的命令
-        if message_text.startswith('/点赞') or message_text == '点赞状态' or message_text == '点赞统计' or \
-           message_text.startswith('点赞状态') or message_text.startswith('点赞统计'):
-            return
-            
-        if not any(keyword in message_text for keyword in ["点赞"]):
+        # 预编译的关键词匹配：先查触发词，再排除插件自身的命令消息（带/和私聊中不带/的）
+        self._prefilter_seen += 1
+        if self._prefilter_seen % PREFILTER_SAMPLE:
+            matched = self.config_snapshot.matcher.matches(event.message_str)
+        else:
+            started = time.perf_counter()
+            matched = self.config_snapshot.matcher.matches(event.message_str)
+            self.metrics.observe('prefilter', time.perf_counter() - started)
+        if not matched:
             return
         
         # 获取用户ID
@@ -171,112 +347,338 @@ class RandomLikesPlugin(Star):
         if not user_id:
             return
         
-        # 检查今天是否已经点过赞
-        if self.is_user_liked_today(user_id):
-            yield event.plain_result("今天已经给你点过赞了哦，明天再来吧~")
+        # 记录按 (平台, 机器人账号) 分开存放，不同账号之间互不影响
+        platform_name = event.get_platform_name()
+        self.metrics.inc('trigger', platform_name)
+        namespace = self.like_store.namespace(platform_name, event.get_self_id())
+        
+        # 冷却期内已经回复过的用户，直接忽略
+        key = (namespace, user_id)
+        if self.user_reply_cooldown.get(key):
+            self.metrics.inc('cooldown', platform_name)
+            return
+        
+        # 同一用户已有进行中的点赞时共享其结果，不重复调用 send_like
+        inflight = self._inflight_likes.get(key)
+        if inflight is not None:
+            liked, _ = await asyncio.shield(inflight)
+            if liked and self._allow_liked_reply(event, namespace):
+                yield event.plain_result(ALREADY_LIKED_REPLY)
             return
+        
+        task = asyncio.ensure_future(self._like_user(event, namespace, user_id))
+        self._inflight_likes[key] = task
+        task.add_done_callback(lambda t: self._inflight_likes.pop(key, None)
+                               if self._inflight_likes.get(key) is t else None)
+        liked, reply = await asyncio.shield(task)
+        if liked:
+            self.user_reply_cooldown.set(key, ttl=self.config_snapshot.reply_cooldown_user)
+        if reply == ALREADY_LIKED_REPLY and not self._allow_liked_reply(event, namespace):
+            return
+        yield event.plain_result(reply)
+
+    def _allow_liked_reply(self, event: AstrMessageEvent, namespace: str) -> bool:
+        """同一群在冷却期内只回复一次“今天已经点过赞”"""
+        group_id = event.get_group_id()
+        if not group_id:
+            return True
+        key = (namespace, group_id)
+        if self.group_reply_cooldown.get(key):
+            return False
+        self.group_reply_cooldown.set(key, ttl=self.config_snapshot.reply_cooldown_group)
+        return True
+
+    async def _like_user(self, event: AstrMessageEvent, namespace: str, user_id: str) -> tuple:
+        """为用户点赞一次，返回 (今天是否已点赞, 回复文本)"""
+        # 不支持点赞的平台（调用函数已缓存）直接回复，不查询也不写入点赞记录
+        platform_name = event.get_platform_name()
+        if self.like_resolver.resolve(platform_name) is None:
+            self.metrics.inc('skipped', platform_name)
+            return False, LIKE_FAILED_REPLY
+
+        # 检查今天是否已经点过赞
+        started = time.perf_counter()
+        liked = await self.is_user_liked_today(user_id, namespace)
+        self.metrics.observe('dedup', time.perf_counter() - started)
+        if liked:
+            self.metrics.inc('already_liked', platform_name)
+            return True, ALREADY_LIKED_REPLY
+        
+        # 已知不是好友（不在好友列表中，或最近点赞失败过）时直接回复，不调用 send_like
+        if not self._may_like(platform_name, user_id):
+            self.metrics.inc('skipped', platform_name)
+            return False, LIKE_FAILED_REPLY
             
         likes = random.randint(1, 10)
         
+        # 在调用 send_like 之前先占用今天的名额，失败时回滚
+        previous = await self.like_store.get(namespace, user_id)
+        await self.record_user_like(user_id, likes, namespace)
+        
         # 尝试执行QQ点赞操作
         try:
             success = await self.perform_qq_like(event, likes)
-            
-            if success:
-                # 记录点赞信息
-                self.record_user_like(user_id, likes)
-                yield event.plain_result(f"✨ 已为你点赞 {likes} 次~")
-            else:
-                yield event.plain_result(f"❌ 点赞失败，可能是平台不支持或需要添加好友")
-                
         except Exception as e:
             if str(e) == "LIKE_LIMIT_REACHED":
                 # 虽然达到上限，但仍然记录用户已点赞，避免重复尝试
-                self.record_user_like(user_id, likes)
-                yield event.plain_result("丛雨今天已经给你点过赞了哦，明天再来吧~")
+                return True, "丛雨今天已经给你点过赞了哦，明天再来吧~"
+            success = False
+        
+        if success:
+            return True, f"✨ 已为你点赞 {likes} 次~"
+        
+        await self._release_like_slot(namespace, user_id, previous)
+        return False, LIKE_FAILED_REPLY
+
+    @filter.event_message_type(filter.EventMessageType.ALL)
+    async def friend_notice(self, event: AstrMessageEvent):
+        """好友添加通知：更新好友列表缓存"""
+        if not self.friend_cache.enabled:
+            return
+        raw = getattr(getattr(event, 'message_obj', None), 'raw_message', None)
+        if not isinstance(raw, dict) or raw.get('notice_type') != 'friend_add':
+            return
+        user_id = str(raw.get('user_id', ''))
+        if user_id:
+            self.friend_cache.add_friend(event.get_platform_name(), user_id)
+            logger.info(f"新好友 {user_id}，已加入好友列表缓存")
+
+    async def _release_like_slot(self, namespace: str, user_id: str, previous):
+        """点赞失败时回滚预占的记录"""
+        try:
+            if previous is None:
+                await self.like_store.delete(namespace, user_id)
             else:
-                yield event.plain_result(f"❌ 点赞失败，可能是平台不支持或需要添加好友")
+                await self.like_store.set(namespace, user_id, previous)
+        except Exception as e:
+            logger.error(f"回滚用户 {user_id} 的点赞记录失败: {e}")
 
     async def perform_qq_like(self, event: AstrMessageEvent, count: int) -> bool:
         """执行QQ点赞操作"""
+        # 获取发送者ID
+        sender_id = event.get_sender_id()
+        if not sender_id:
+            logger.warning("无法获取发送者ID")
+            return False
+        return await self.send_like_to(event.get_platform_name(), event.get_self_id(), sender_id, count)
+
+    async def send_like_to(self, platform_name: str, self_id: str, user_id: str, count: int) -> bool:
+        """为指定用户点赞（关键词点赞和批量任务共用），达到上限时抛出 LIKE_LIMIT_REACHED"""
         try:
-            # 获取平台信息
-            platform_name = event.get_platform_name()
-            
-            # 只有QQ平台才支持点赞功能
-            if platform_name.lower() not in ['qq', 'aiocqhttp', 'onebot']:
-                logger.info(f"平台 {platform_name} 不支持点赞功能")
+            # 平台的点赞调用函数已缓存，不支持的平台在这里直接返回
+            send = self.like_resolver.resolve(platform_name)
+            if send is None:
                 return False
             
-            # 获取发送者ID
-            sender_id = event.get_sender_id()
-            if not sender_id:
-                logger.warning("无法获取发送者ID")
-                return False
-            
-            # 获取平台适配器
-            platform = self.context.get_platform(platform_name)
-            if not platform:
-                logger.warning(f"无法获取平台适配器: {platform_name}")
-                return False
-            
-            # 尝试获取原始客户端对象
-            if hasattr(platform, 'client') or hasattr(platform, 'bot'):
-                client = getattr(platform, 'client', None) or getattr(platform, 'bot', None)
-                
-                # 尝试调用点赞API
-                if hasattr(client, 'send_like'):
-                    # OneBot v11 标准的点赞API
-                    await client.send_like(user_id=int(sender_id), times=min(count, 10))  # QQ限制每日最多10次
-                    logger.info(f"成功为用户 {sender_id} 点赞 {min(count, 10)} 次")
-                    return True
-                elif hasattr(client, 'call_api'):
-                    # 通用API调用方式
-                    await client.call_api('send_like', user_id=int(sender_id), times=min(count, 10))
-                    logger.info(f"通过call_api为用户 {sender_id} 点赞 {min(count, 10)} 次")
-                    return True
-                else:
-                    logger.warning("客户端不支持点赞API")
-                    return False
-            else:
-                logger.warning("无法获取平台客户端对象")
-                return False
+            # 调用点赞API，统一经调度队列限速执行；熔断中时不排队，直接失败
+            times = min(count, 10)  # QQ限制每日最多10次
+            self.like_guard.check(platform_name)
+            started = time.perf_counter()
+            try:
+                await self.like_dispatcher.submit(
+                    (platform_name, self_id, user_id),
+                    lambda: self.like_guard.call(platform_name, lambda: send(int(user_id), times))
+                )
+            finally:
+                self.metrics.observe('send_like', time.perf_counter() - started)
+            self.metrics.inc('success', platform_name)
+            if self.config_snapshot.debug_log:
+                logger.info(f"成功为用户 {user_id} 点赞 {times} 次")
+            return True
                 
+        except CircuitOpenError as e:
+            self.metrics.inc('rejected', platform_name)
+            if self.config_snapshot.debug_log:
+                logger.warning(str(e))
+            return False
+        except asyncio.QueueFull:
+            # 本地调度队列已满，没有调用协议端，不能当作点赞失败（不缓存为非好友）
+            self.metrics.inc('rejected', platform_name)
+            if self.config_snapshot.debug_log:
+                logger.warning(f"点赞调度队列已满，跳过用户 {user_id}")
+            return False
         except Exception as e:
-            error_msg = str(e)
-            logger.error(f"执行点赞操作时出错: {e}")
-            
             # 检查是否是点赞上限错误
-            if any(keyword in error_msg for keyword in [
-                "点赞数已达上限", 
-                "retcode=1200", 
-                "今日同一好友点赞数已达上限",
-                "点赞失败 今日同一好友点赞数已达上限"
-            ]):
+            kind = self.like_guard.classifier.classify(e)
+            if kind == LikeErrorClassifier.LIMIT:
                 # 这是一个特殊情况，需要在调用方处理
+                self.metrics.inc('limit', platform_name)
+                if self.config_snapshot.debug_log:
+                    logger.info(f"用户 {user_id} 今日点赞已达上限: {e}")
                 raise Exception("LIKE_LIMIT_REACHED")
             
+            self.metrics.inc('failed', platform_name)
+            logger.error(f"执行点赞操作时出错: {e}")
+            if kind == LikeErrorClassifier.FATAL:
+                # 协议端拒绝（通常是非好友），一段时间内不再尝试
+                self.friend_cache.mark_failed(platform_name, user_id)
+            else:
+                # 暂时性错误可能是适配器重连导致客户端失效，下次重新解析
+                self.like_resolver.invalidate(platform_name)
             return False
 
+    def _may_like(self, platform_name: str, user_id: str) -> bool:
+        """好友列表缓存的本地预检（未启用时总是 True）"""
+        if not self.friend_cache.enabled:
+            return True
+        self.like_resolver.resolve(platform_name)
+        return self.friend_cache.may_like(platform_name, user_id, self.like_resolver.client(platform_name))
+
+    async def _campaign_like(self, platform_name: str, self_id: str, user_id: str, count: int) -> str:
+        """批量任务中为单个用户点赞，返回 liked / limit / failed"""
+        if not self._may_like(platform_name, user_id):
+            return 'failed'
+        try:
+            return 'liked' if await self.send_like_to(platform_name, self_id, user_id, count) else 'failed'
+        except Exception as e:
+            if str(e) == "LIKE_LIMIT_REACHED":
+                return 'limit'
+            logger.error(f"批量点赞用户 {user_id} 失败: {e}")
+            return 'failed'
+
+    async def _notify_campaign(self, campaign):
+        """批量任务完成后通知发起的会话"""
+        if not campaign.origin:
+            return
+        await self.context.send_message(
+            campaign.origin, MessageChain().message(f"✅ 批量点赞任务已完成\n{campaign.progress_text()}")
+        )
+
+    async def _subscription_schedule(self, at: str):
+        """每天 at（HH:MM）为订阅用户启动批量点赞任务"""
+        try:
+            hour, minute = (int(part) for part in at.split(':'))
+            if not (0 <= hour < 24 and 0 <= minute < 60):
+                raise ValueError(at)
+        except ValueError:
+            logger.error(f"subscriber_like_time 格式应为 HH:MM: {at}")
+            return
+        while True:
+            now = datetime.now()
+            next_run = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+            if next_run <= now:
+                next_run += timedelta(days=1)
+            await asyncio.sleep((next_run - now).total_seconds())
+            started = self.campaigns.start_subscriptions(date.today().toordinal())
+            if started:
+                logger.info(f"已启动 {len(started)} 个每日订阅点赞任务")
+
+    @filter.command("批量点赞")
+    async def bulk_like(self, event: AstrMessageEvent):
+        """批量点赞 /批量点赞 QQ号 [QQ号...] 或 /批量点赞 群 群号 (仅管理员)"""
+        if not self.is_admin(event):
+            yield event.plain_result("❌ 此指令仅限管理员使用")
+            return
+        
+        args = event.message_str.strip().split()[1:]
+        platform_name = event.get_platform_name()
+        self_id = event.get_self_id()
+        if len(args) == 2 and args[0] == "群":
+            client = self.like_resolver.client(platform_name) if self.like_resolver.resolve(platform_name) else None
+            if client is None:
+                yield event.plain_result("❌ 当前平台不支持批量点赞")
+                return
+            try:
+                members = await fetch_group_member_list(client, args[1])
+            except Exception as e:
+                logger.error(f"获取群成员列表失败: {e}")
+                yield event.plain_result("❌ 获取群成员列表失败")
+                return
+            users = [str(m['user_id']) for m in members
+                     if isinstance(m, dict) and 'user_id' in m and str(m['user_id']) != str(self_id)]
+            source = f"群 {args[1]}"
+        else:
+            users = [arg for arg in args if arg.isdigit()]
+            source = "指定用户"
+        
+        if not users:
+            yield event.plain_result("❌ 请提供QQ号或群号\n格式: /批量点赞 QQ号 [QQ号...] 或 /批量点赞 群 群号")
+            return
+        
+        namespace = self.like_store.namespace(platform_name, self_id)
+        campaign = self.campaigns.start(namespace, platform_name, self_id, users, self.current_day,
+                                        source=source, origin=getattr(event, 'unified_msg_origin', None))
+        yield event.plain_result(f"🚀 已开始批量点赞任务 #{campaign.id}: {campaign.total} 人\n使用 /点赞任务 查看进度")
+
+    @filter.command("点赞任务")
+    async def campaign_status(self, event: AstrMessageEvent):
+        """查看批量点赞任务进度 (仅管理员)"""
+        if not self.is_admin(event):
+            yield event.plain_result("❌ 此指令仅限管理员使用")
+            return
+        campaigns = sorted(self.campaigns.campaigns.values(), key=lambda c: int(c.id))[-10:]
+        if not campaigns:
+            yield event.plain_result("暂无批量点赞任务")
+            return
+        subscribers = sum(len(entry.get('users', [])) for entry in self.campaigns.subscribers.values())
+        lines = "\n".join(f"• {campaign.progress_text()}" for campaign in campaigns)
+        yield event.plain_result(f"📋 批量点赞任务 (订阅用户 {subscribers} 人)\n{lines}")
+
+    @filter.command("取消点赞任务")
+    async def cancel_campaign(self, event: AstrMessageEvent):
+        """取消批量点赞任务 /取消点赞任务 任务ID (仅管理员)"""
+        if not self.is_admin(event):
+            yield event.plain_result("❌ 此指令仅限管理员使用")
+            return
+        args = event.message_str.strip().split()[1:]
+        if not args:
+            yield event.plain_result("❌ 请提供任务ID: /取消点赞任务 任务ID")
+            return
+        campaign_id = args[0].lstrip('#')
+        if self.campaigns.cancel(campaign_id):
+            yield event.plain_result(f"✅ 已取消批量点赞任务 #{campaign_id}")
+        else:
+            yield event.plain_result(f"❌ 没有正在运行的任务 #{campaign_id}")
+
+    @filter.command("订阅点赞")
+    async def subscribe_likes(self, event: AstrMessageEvent):
+        """订阅每日定时点赞"""
+        user_id = event.get_sender_id()
+        platform_name = event.get_platform_name()
+        self_id = event.get_self_id()
+        namespace = self.like_store.namespace(platform_name, self_id)
+        if self.campaigns.subscribe(namespace, platform_name, self_id, user_id):
+            await self.campaigns.save()
+            yield event.plain_result("✅ 已订阅每日点赞")
+        else:
+            yield event.plain_result("你已经订阅过每日点赞了哦~")
+
+    @filter.command("取消订阅点赞")
+    async def unsubscribe_likes(self, event: AstrMessageEvent):
+        """取消每日定时点赞"""
+        namespace = self.like_store.namespace(event.get_platform_name(), event.get_self_id())
+        if self.campaigns.unsubscribe(namespace, event.get_sender_id()):
+            await self.campaigns.save()
+            yield event.plain_result("✅ 已取消每日点赞订阅")
+        else:
+            yield event.plain_result("你还没有订阅每日点赞哦~")
+
     @filter.command("点赞状态")
     async def like_status(self, event: AstrMessageEvent):
         """查看插件状态和配置"""
-        min_val = self.get_config_value("min_likes", 1)
-        max_val = self.get_config_value("max_likes", 10)
-        enabled = self.get_config_value("enabled", True)
+        min_val = self.config_snapshot.min_likes
+        max_val = self.config_snapshot.max_likes
+        enabled = self.config_snapshot.enabled
         
         status = "启用" if enabled else "禁用"
+        cooldown_hits = self.user_reply_cooldown.hits + self.group_reply_cooldown.hits
+        cooldown_misses = self.user_reply_cooldown.misses + self.group_reply_cooldown.misses
         
         status_msg = f"""
 📊 随机点赞插件状态
 
 状态: {status}
 点赞范围: {min_val} - {max_val}
+回复冷却: 用户 {self.config_snapshot.reply_cooldown_user} 秒 / 群 {self.config_snapshot.reply_cooldown_group} 秒 (命中 {cooldown_hits} 次, 未命中 {cooldown_misses} 次)
 
 可用指令:
 • /设置点赞范围 最小值 最大值 - 设置点赞范围 (仅管理员) (例: /设置点赞范围 1 10)
 • /点赞状态 - 查看状态
 • /点赞统计 - 查看点赞统计
+• /订阅点赞 / 取消订阅点赞 - 订阅每日定时点赞
+• /批量点赞 QQ号... 或 /批量点赞 群 群号 - 批量点赞 (仅管理员)
+• /点赞任务, /取消点赞任务 任务ID - 查看/取消批量任务 (仅管理员)
+• /点赞指标 - 查看耗时和运行指标 (仅管理员)
 • 发送包含"点赞"的消息会自动触发点赞
 
 注意: 
@@ -291,23 +693,19 @@ class RandomLikesPlugin(Star):
     async def like_stats(self, event: AstrMessageEvent):
         """查看点赞统计信息"""
         try:
-            records = self.load_like_records()
-            today = date.today().isoformat()
-            
-            # 统计今日点赞数据
-            today_likes = []
-            total_users = len(records)
-            
-            for user_id, record in records.items():
-                if record.get('date') == today:
-                    today_likes.append(record['count'])
-            
-            today_count = len(today_likes)
-            today_total_likes = sum(today_likes) if today_likes else 0
+            # 最近7天的每日数据由存储后端在写入时增量维护（SQLite 为 like_daily 表），不扫描记录
+            namespace = self.like_store.namespace(event.get_platform_name(), event.get_self_id())
+            series = await self.like_store.recent_stats(namespace, self.current_day, 7)
+            _, today_count, today_total_likes = series[-1]
+            total_users = await self.like_store.user_count(namespace)
+            trend = "\n".join(
+                f"• {date.fromordinal(day).strftime('%m-%d')}: {users} 人 / {likes} 次"
+                for day, users, likes in series
+            )
             
             # 检查当前用户是否已点赞
             current_user_id = event.get_sender_id()
-            user_status = "已点赞" if self.is_user_liked_today(current_user_id) else "未点赞"
+            user_status = "已点赞" if await self.is_user_liked_today(current_user_id, namespace) else "未点赞"
             
             stats_msg = f"""
 📈 点赞统计信息
@@ -317,6 +715,9 @@ class RandomLikesPlugin(Star):
 • 总点赞数: {today_total_likes} 次
 • 当前状态: {user_status}
 
+近7天趋势:
+{trend}
+
 历史数据:
 • 总用户数: {total_users} 人
 • 记录保留: 最近7天
@@ -330,137 +731,291 @@ class RandomLikesPlugin(Star):
             logger.error(f"获取点赞统计失败: {e}")
             yield event.plain_result("❌ 获取统计信息失败")
 
+    @filter.command("点赞指标")
+    async def like_metrics(self, event: AstrMessageEvent):
+        """查看点赞各阶段耗时和运行指标 (仅管理员)"""
+        if not self.is_admin(event):
+            yield event.plain_result("❌ 此指令仅限管理员使用")
+            return
+        try:
+            snapshot = self.metrics.snapshot()
+            stages = "\n".join(
+                f"• {stage}: {data['count']} 次 / 平均 {data['avg_ms']:.2f} / p50 {data['p50_ms']:.2f} / "
+                f"p99 {data['p99_ms']:.2f} / 最大 {data['max_ms']:.2f}"
+                for stage, data in snapshot['stages'].items()
+            )
+            events = "\n".join(f"• {name}: {value}" for name, value in snapshot['counters'].items()) or "• 暂无"
+            dispatch = self.like_dispatcher.snapshot()
+            guard = self.like_guard.stats()
+            friends = self.friend_cache.stats()
+            user_cooldown = self.user_reply_cooldown.stats()
+            group_cooldown = self.group_reply_cooldown.stats()
+            storage = "\n".join(
+                f"• {namespace or '默认'}: {users} 人 / {size / 1024:.1f} KB"
+                for namespace, users, size in await self.like_store.storage_stats()
+            ) or "• 暂无已加载的记录"
+            breakers = ", ".join(f"{name} {state}" for name, state in guard['breakers'].items()) or "无"
+            
+            metrics_msg = f"""
+📊 点赞指标 (运行 {snapshot['uptime_seconds']:.0f} 秒)
+
+耗时 (毫秒):
+{stages}
+
+事件计数:
+{events}
+
+调度队列: 排队 {dispatch['queue_depth']}, 提交 {dispatch['submitted']}, 合并 {dispatch['coalesced']}, 平均等待 {dispatch['wait_avg_ms']:.1f}ms, 平均调用 {dispatch['latency_avg_ms']:.1f}ms
+熔断与重试: 重试 {guard['retries']} 次, 拒绝 {guard['rejected']} 次, 状态: {breakers}
+回复冷却: 用户 {user_cooldown['size']} 条 (命中率 {user_cooldown['hit_rate']:.0%}), 群 {group_cooldown['size']} 条 (命中率 {group_cooldown['hit_rate']:.0%})
+好友缓存: {friends['friends']} 人, 跳过 {friends['skipped']} 次, 失败缓存 {friends['negative']['size']} 条
+
+点赞记录:
+{storage}
+            """.strip()
+            
+            yield event.plain_result(metrics_msg)
+            
+        except Exception as e:
+            logger.error(f"获取点赞指标失败: {e}")
+            yield event.plain_result("❌ 获取点赞指标失败")
+
+    async def _metrics_gauges(self) -> list:
+        """队列、缓存、熔断和存储的当前值，用于 Prometheus 文本"""
+        dispatch = self.like_dispatcher.snapshot()
+        guard = self.like_guard.stats()
+        friends = self.friend_cache.stats()
+        gauges = [
+            ('queue_depth', {}, dispatch['queue_depth']),
+            ('dispatch_submitted', {}, dispatch['submitted']),
+            ('dispatch_coalesced', {}, dispatch['coalesced']),
+            ('like_retries', {}, guard['retries']),
+            ('like_rejected', {}, guard['rejected']),
+            ('friends', {}, friends['friends']),
+            ('friend_skipped', {}, friends['skipped']),
+        ]
+        gauges += [('breaker_open', {'platform': name}, int(state != 'closed'))
+                   for name, state in guard['breakers'].items()]
+        cooldowns = {'user': self.user_reply_cooldown.stats(), 'group': self.group_reply_cooldown.stats()}
+        for field in ('size', 'hits', 'misses'):
+            gauges += [(f'cooldown_{field}', {'scope': scope}, stats[field]) for scope, stats in cooldowns.items()]
+        storage = await self.like_store.storage_stats()
+        gauges += [('records', {'namespace': namespace}, users) for namespace, users, _ in storage]
+        gauges += [('storage_bytes', {'namespace': namespace}, size) for namespace, _, size in storage]
+        return gauges
+
+    async def _dump_metrics(self, interval: float):
+        """定期把指标写成 Prometheus 文本文件，供 node_exporter 等采集"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                text = self.metrics.to_prometheus(await self._metrics_gauges())
+                await self.file_io.run(self.metrics_file, atomic_write_text, self.metrics_file, text)
+            except Exception as e:
+                logger.debug(f"写出指标文件失败: {e}")
+
     async def terminate(self):
         """插件销毁方法"""
+        for task in (self._config_watch_task, self._rollover_task, self._startup_task, self._schedule_task,
+                     self._metrics_task):
+            if task is not None:
+                task.cancel()
+        # 运行中的批量任务先提交进度，下次启动时继续
+        await self.campaigns.close()
+        # 写回尚未落盘的点赞记录
+        await self.like_dispatcher.close()
+        await self.friend_cache.close()
+        await self.like_store.close()
+        self.file_io.shutdown()
         logger.info("随机点赞插件已卸载")
 
-    def load_like_records(self) -> dict:
-        """加载点赞记录"""
-        try:
-            if os.path.exists(self.like_records_file):
-                with open(self.like_records_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-        except Exception as e:
-            logger.error(f"加载点赞记录失败: {e}")
-        return {}
+    async def load_like_records(self, namespace: str = '') -> dict:
+        """获取命名空间内的全部点赞记录"""
+        return await self.like_store.all_records(namespace)
     
-    def save_like_records(self, records: dict):
-        """保存点赞记录"""
-        try:
-            logger.info(f"正在保存点赞记录到: {self.like_records_file}")
-            logger.debug(f"记录内容: {len(records)} 条记录")
-            
-            # 确保目录存在
-            records_dir = os.path.dirname(self.like_records_file)
-            if not os.path.exists(records_dir):
-                os.makedirs(records_dir, exist_ok=True)
-                logger.info(f"创建记录目录: {records_dir}")
-            
-            with open(self.like_records_file, 'w', encoding='utf-8') as f:
-                json.dump(records, f, ensure_ascii=False, indent=2)
-            
-            # 验证文件是否成功保存
-            if os.path.exists(self.like_records_file):
-                file_size = os.path.getsize(self.like_records_file)
-                logger.info(f"✅ 点赞记录保存成功: {self.like_records_file} (大小: {file_size} 字节)")
-            else:
-                logger.error(f"❌ 点赞记录保存失败，文件不存在: {self.like_records_file}")
-                
-        except Exception as e:
-            logger.error(f"保存点赞记录失败: {e}")
-            logger.error(f"目标路径: {self.like_records_file}")
-            logger.error(f"记录目录: {os.path.dirname(self.like_records_file)}")
-            logger.error(f"当前工作目录: {os.getcwd()}")
+    async def save_like_records(self, records: dict, namespace: str = ''):
+        """整体替换命名空间内的点赞记录"""
+        await self.like_store.replace(namespace, records)
     
-    def is_user_liked_today(self, user_id: str) -> bool:
+    async def is_user_liked_today(self, user_id: str, namespace: str = '') -> bool:
         """检查用户今天是否已被点赞"""
-        records = self.load_like_records()
-        today = date.today().isoformat()
-        return user_id in records and records[user_id].get('date') == today
+        return await self.like_store.is_liked_on(namespace, user_id, self.current_day)
     
-    def record_user_like(self, user_id: str, count: int):
+    async def record_user_like(self, user_id: str, count: int, namespace: str = ''):
         """记录用户点赞信息"""
-        records = self.load_like_records()
-        today = date.today().isoformat()
-        records[user_id] = {
-            'date': today,
-            'count': count,
-            'timestamp': datetime.now().isoformat()
-        }
-        self.save_like_records(records)
+        started = time.perf_counter()
+        await self.like_store.set(namespace, user_id, LikeRecord(self.current_day, count, int(time.time())))
+        self.metrics.observe('persist', time.perf_counter() - started)
     
-    def clean_old_records(self):
-        """清理过期的点赞记录（保留最近7天）"""
+    async def clean_old_records(self):
+        """清理已加载分片中过期的点赞记录（保留最近7天）"""
         try:
-            records = self.load_like_records()
-            today = date.today()
-            cleaned_records = {}
-            
-            for user_id, record in records.items():
-                try:
-                    record_date = date.fromisoformat(record['date'])
-                    # 保留最近7天的记录
-                    if (today - record_date).days <= 7:
-                        cleaned_records[user_id] = record
-                except Exception:
-                    continue
-            
-            if len(cleaned_records) != len(records):
-                self.save_like_records(cleaned_records)
-                logger.info(f"清理了 {len(records) - len(cleaned_records)} 条过期记录")
+            removed = await self.like_store.remove_expired(7, self.current_day)
+            if removed:
+                logger.info(f"清理了 {removed} 条过期记录")
         except Exception as e:
             logger.error(f"清理过期记录失败: {e}")
     
-    def get_config_value(self, key: str, default_value=None):
-        """安全获取配置值"""
-        try:
-            # 首先尝试从 AstrBot 配置系统获取
-            if self.config_available and self.config is not None:
-                value = self.config.get(key)
-                if value is not None:
-                    return value
+    async def _day_rollover(self):
+        """每天零点切换当前日序号，并整桶清理过期记录"""
+        while True:
+            now = datetime.now()
+            next_midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+            await asyncio.sleep((next_midnight - now).total_seconds() + 1)
+            today = date.today().toordinal()
+            if today == self.current_day:
+                continue
+            self.current_day = today
+            # 冷却中的用户昨天已点过赞，零点后应重新允许
+            self.user_reply_cooldown.clear()
+            self.group_reply_cooldown.clear()
+            await self.clean_old_records()
+    
+    def _create_like_store(self, config: dict) -> ShardedLikeRecordStore:
+        """根据 storage_mode / shard_records 配置创建分片的点赞记录存储（不加载记录）"""
+        storage_mode = str(config["storage_mode"]).lower()
+        snapshot_format = str(config["snapshot_format"]).lower()
+        if snapshot_format not in ("json", "binary"):
+            logger.warning(f"未知的快照格式 {snapshot_format}，使用 json")
+            snapshot_format = "json"
+        compact_bytes = int(config["journal_compact_bytes"])
+        shard_records = bool(config["shard_records"])
+        partitions = int(config["shard_partitions"])
+        
+        if storage_mode == "journal":
+            logger.debug(f"点赞记录使用追加日志模式 (压缩阈值: {compact_bytes} 字节)")
             
-            # 如果 AstrBot 配置系统不可用，从本地配置文件获取
-            local_config = self._load_local_config()
-            if key in local_config:
-                return local_config[key]
+            def factory(path: str) -> LikeRecordBackend:
+                return JournalLikeRecordStore(path, self.file_io, compact_bytes=compact_bytes,
+                                              retention_days=7, snapshot_format=snapshot_format)
+        elif storage_mode == "shared":
+            logger.debug(f"点赞记录使用多进程共享模式 (压缩阈值: {compact_bytes} 字节)")
             
-            return default_value
-        except Exception as e:
-            logger.error(f"获取配置项 {key} 失败: {e}")
-            return default_value
-    
-    def set_config_value(self, key: str, value):
-        """安全设置配置值"""
-        try:
-            success = False
-            logger.info(f"正在设置配置项: {key} = {value}")
+            def factory(path: str) -> LikeRecordBackend:
+                return SharedLikeRecordStore(path, self.file_io, compact_bytes=compact_bytes,
+                                             retention_days=7, snapshot_format=snapshot_format)
+        elif storage_mode == "sqlite":
+            logger.debug("点赞记录使用 SQLite 存储")
             
-            # 首先尝试使用 AstrBot 配置系统
-            if self.config_available and self.config is not None:
-                try:
-                    self.config.set(key, value)
-                    self.config.save()
-                    logger.info(f"✅ 通过 AstrBot 配置系统设置 {key} 成功")
-                    success = True
-                except Exception as e:
-                    logger.warning(f"使用 AstrBot 配置系统设置 {key} 失败: {e}")
+            def factory(path: str) -> LikeRecordBackend:
+                return SqliteLikeRecordStore(os.path.splitext(path)[0] + '.db', self.file_io, legacy_json_file=path)
+        else:
+            if storage_mode != "json":
+                logger.warning(f"未知的存储模式 {storage_mode}，使用 json")
             
-            # 同时保存到本地配置文件作为备份
+            def factory(path: str) -> LikeRecordBackend:
+                return LikeRecordStore(path, self.file_io, snapshot_format=snapshot_format)
+        
+        logger.debug(f"点赞记录分片: {'按平台和机器人账号' if shard_records else '关闭'}, 分区数: {partitions}")
+        return ShardedLikeRecordStore(self.like_records_file, self.file_io, factory,
+                                      enabled=shard_records, partitions=partitions)
+    
+    def get_config_values(self, defaults: dict) -> dict:
+        """批量获取配置值，本地配置文件最多读取一次"""
+        values = {}
+        local_config = None
+        for key, default_value in defaults.items():
             try:
-                local_config = self._load_local_config()
-                local_config[key] = value
-                self._save_local_config(local_config)
-                logger.info(f"✅ 通过本地配置文件设置 {key} 成功")
-                success = True
+                value = None
+                if self.config_available and self.config is not None:
+                    value = self.config.get(key)
+                if value is None:
+                    if local_config is None:
+                        local_config = self._cached_local_config()
+                    value = local_config.get(key, default_value)
+                values[key] = value
             except Exception as e:
-                logger.error(f"保存到本地配置文件失败: {e}")
+                logger.error(f"获取配置项 {key} 失败: {e}")
+                values[key] = default_value
+        return values
+    
+    async def set_config_values_async(self, values: dict) -> bool:
+        """在文件线程池中批量设置配置值，成功后同步更新配置快照"""
+        success = await self.file_io.run(self.local_config_file, self.set_config_values, values)
+        if success:
+            self.config_snapshot.update(values)
+        return success
+    
+    async def refresh_config_snapshot(self):
+        """重新读取配置并更新内存快照（关键词不变时沿用已编译的匹配器）"""
+        values, mtime = await self.file_io.run(self.local_config_file, self._read_config_snapshot)
+        self.config_snapshot.update(values)
+        self.config_snapshot.mtime = mtime
+        self.like_dispatcher.verbose = self.config_snapshot.debug_log
+    
+    def _read_config_snapshot(self) -> tuple:
+        """读取快照覆盖的配置项及本地配置文件的 mtime（在文件线程池中执行）"""
+        mtime = self._local_config_mtime()
+        return self.get_config_values(ConfigSnapshot.DEFAULTS), mtime
+    
+    def _read_startup_config(self) -> tuple:
+        """读取快照和启动所需的配置项，返回 (配置, 缺失的默认配置, mtime)（在文件线程池中执行）"""
+        mtime = self._local_config_mtime()
+        config = self.get_config_values({**ConfigSnapshot.DEFAULTS, **STARTUP_CONFIG,
+                                         **dict.fromkeys(REQUIRED_CONFIG)})
+        missing = {key: ConfigSnapshot.DEFAULTS[key] for key in REQUIRED_CONFIG if config[key] is None}
+        config.update(missing)
+        return config, missing, mtime
+    
+    def _cached_local_config(self) -> dict:
+        """本地配置文件的内容，文件 mtime 未变化时直接返回上次读取的结果（在文件线程池中执行）"""
+        mtime = self._local_config_mtime()
+        cache = self._local_config_cache
+        if cache is None or mtime is None or cache[0] != mtime:
+            cache = self._local_config_cache = (mtime, self._load_local_config())
+        return cache[1]
+    
+    def _local_config_mtime(self):
+        try:
+            return os.stat(self.local_config_file).st_mtime_ns
+        except OSError:
+            return None
+    
+    async def _watch_config(self, interval: float):
+        """按固定间隔检查配置是否变化，变化时刷新快照"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self._check_admin_source()
+                mtime = await self.file_io.submit(self._local_config_mtime)
+                # AstrBot 配置系统的值在内存中，读取代价很低，每次都刷新；
+                # 本地配置文件只在 mtime 变化时重新解析（见 _cached_local_config）
+                if self.config_available or mtime != self.config_snapshot.mtime:
+                    await self.refresh_config_snapshot()
+            except Exception as e:
+                logger.debug(f"刷新配置快照失败: {e}")
+    
+    def set_config_values(self, values: dict) -> bool:
+        """原子地设置多个配置项：每个配置后端只保存一次，任一后端失败时全部回滚"""
+        if not values:
+            return True
+        logger.debug(f"正在批量设置配置项: {list(values)}")
+        previous = None
+        try:
+            if self.config_available and self.config is not None:
+                previous = {key: self.config.get(key) for key in values}
+                for key, value in values.items():
+                    self.config.set(key, value)
+                self.config.save()
             
-            logger.info(f"配置设置结果: {key} = {value}, 成功: {success}")
-            return success
+            # 本地配置文件整体替换（临时文件 + 重命名），写入失败时原文件保持不变
+            local_config = self._load_local_config()
+            local_config.update(values)
+            atomic_write_json(self.local_config_file, local_config, indent=2)
+            self._local_config_cache = None
         except Exception as e:
-            logger.error(f"设置配置项 {key} 失败: {e}")
+            logger.error(f"批量设置配置项失败，已回滚: {e}")
+            if previous is not None:
+                try:
+                    for key, value in previous.items():
+                        self.config.set(key, value)
+                    self.config.save()
+                except Exception as rollback_error:
+                    logger.error(f"回滚 AstrBot 配置失败: {rollback_error}")
             return False
+        
+        logger.info(f"✅ 批量设置配置项成功: {list(values)}")
+        return True
     
     def is_admin(self, event: AstrMessageEvent) -> bool:
         """检查用户是否为管理员"""
@@ -474,53 +1029,61 @@ class RandomLikesPlugin(Star):
             if not sender_id:
                 return False
             
-            # 获取AstrBot全局配置（不是插件配置）
-            try:
-                # 尝试获取全局配置
-                astr_config = self.context.get_context_config()
-                if astr_config is None:
-                    # 如果没有 get_context_config 方法，尝试其他方式
-                    astr_config = self.context.config if hasattr(self.context, 'config') else None
-                    if astr_config is None:
-                        logger.warning("无法获取全局配置，使用默认管理员检查")
-                        return False
-            except Exception as e:
-                logger.error(f"获取全局配置失败: {e}")
-                return False
+            # 管理员列表已预先解析为集合，检查是 O(1) 的
+            return str(sender_id) in self.admin_ids()
             
-            # 尝试从不同的配置项中获取管理员列表
-            admin_ids = []
-            
-            # 可能的管理员配置键名
-            possible_admin_keys = [
-                'admins',
-                'admin_ids', 
-                "admins_id",
-                'administrators',
-                'admin_list',
-                'admin_users',
-                'superusers'
-            ]
-            
-            for key in possible_admin_keys:
+        except Exception as e:
+            logger.error(f"检查管理员权限时出错: {e}")
+            return False
+    
+    def admin_ids(self) -> frozenset:
+        """管理员 ID 集合，缓存 admin_cache_ttl 秒；全局配置对象变化时由配置检查任务提前失效"""
+        admin_ids, expires_at, _ = self._admin_cache
+        if time.monotonic() < expires_at:
+            return admin_ids
+        return self._refresh_admin_ids()
+    
+    def _refresh_admin_ids(self) -> frozenset:
+        """从 AstrBot 全局配置（不是插件配置）解析管理员列表"""
+        astr_config = self._global_config()
+        admin_ids = set()
+        if astr_config is not None and hasattr(astr_config, 'get'):
+            for key in ADMIN_CONFIG_KEYS:
                 try:
-                    admin_list = astr_config.get(key) if hasattr(astr_config, 'get') else None
-                    if admin_list:
-                        if isinstance(admin_list, list):
-                            admin_ids.extend([str(admin_id) for admin_id in admin_list])
-                        elif isinstance(admin_list, str):
-                            admin_ids.append(admin_list)
-                        break
+                    admin_list = astr_config.get(key)
                 except Exception as e:
                     logger.debug(f"尝试获取配置键 {key} 失败: {e}")
                     continue
-            
-            # 检查发送者是否在管理员列表中
-            return str(sender_id) in admin_ids
-            
+                if admin_list:
+                    if isinstance(admin_list, str):
+                        admin_ids.add(admin_list)
+                    elif isinstance(admin_list, (list, tuple, set)):
+                        admin_ids.update(str(admin_id) for admin_id in admin_list)
+                    break
+        # 取不到全局配置时同样缓存空集合，避免每条消息都重试并刷警告日志
+        admin_ids = frozenset(admin_ids)
+        self._admin_cache = (admin_ids, time.monotonic() + self.admin_cache_ttl, astr_config)
+        return admin_ids
+    
+    def _global_config(self):
+        """AstrBot 全局配置，获取失败时返回 None"""
+        try:
+            astr_config = self.context.get_context_config()
+            if astr_config is None:
+                # 如果没有 get_context_config 方法，尝试其他方式
+                astr_config = getattr(self.context, 'config', None)
+            if astr_config is None:
+                logger.warning("无法获取全局配置，使用默认管理员检查")
+            return astr_config
         except Exception as e:
-            logger.error(f"检查管理员权限时出错: {e}")
-            return False
+            logger.error(f"获取全局配置失败: {e}")
+            return None
+    
+    def _check_admin_source(self):
+        """全局配置对象被替换（如 AstrBot 重载配置）时丢弃管理员缓存"""
+        admin_ids, expires_at, source = self._admin_cache
+        if source is not None and expires_at and self._global_config() is not source:
+            self._admin_cache = (admin_ids, 0.0, source)
     
     def _test_config_system(self) -> bool:
         """测试配置系统是否可用"""
@@ -536,13 +1099,8 @@ class RandomLikesPlugin(Star):
             if not (hasattr(self.config, 'save') and callable(getattr(self.config, 'save', None))):
                 return False
             
-            # 尝试进行一个简单的操作
-            test_key = "test_config_system"
-            self.config.set(test_key, "test_value")
-            value = self.config.get(test_key)
-            if value != "test_value":
-                return False
-            
+            # 只读取，不写入任何配置项
+            self.config.get("enabled")
             return True
         except Exception as e:
             logger.debug(f"配置系统测试失败: {e}")
@@ -557,31 +1115,3 @@ class RandomLikesPlugin(Star):
         except Exception as e:
             logger.error(f"加载本地配置失败: {e}")
         return {}
-    
-    def _save_local_config(self, config_data: dict):
-        """保存本地配置文件"""
-        try:
-            logger.info(f"正在保存配置到: {self.local_config_file}")
-            logger.info(f"配置内容: {config_data}")
-            
-            # 确保目录存在
-            config_dir = os.path.dirname(self.local_config_file)
-            if not os.path.exists(config_dir):
-                os.makedirs(config_dir, exist_ok=True)
-                logger.info(f"创建配置目录: {config_dir}")
-            
-            with open(self.local_config_file, 'w', encoding='utf-8') as f:
-                json.dump(config_data, f, ensure_ascii=False, indent=2)
-            
-            # 验证文件是否成功保存
-            if os.path.exists(self.local_config_file):
-                file_size = os.path.getsize(self.local_config_file)
-                logger.info(f"✅ 配置文件保存成功: {self.local_config_file} (大小: {file_size} 字节)")
-            else:
-                logger.error(f"❌ 配置文件保存失败，文件不存在: {self.local_config_file}")
-                
-        except Exception as e:
-            logger.error(f"保存本地配置失败: {e}")
-            logger.error(f"目标路径: {self.local_config_file}")
-            logger.error(f"配置目录: {os.path.dirname(self.local_config_file)}")
-            logger.error(f"当前工作目录: {os.getcwd()}")
@@ -0,0 +1,39 @@
+import re
+
+
+class TriggerMatcher:
+    """把触发关键词和排除前缀预编译成一次匹配
+
+    绝大多数消息不含触发词，matches() 先做关键词查找，命中后才检查排除前缀，
+    整个过程不会复制消息文本（不调用 lower()）。
+    """
+
+    def __init__(self, keywords, exclude_prefixes=()):
+        self.keywords = tuple(k for k in keywords if k)
+        self.exclude_prefixes = tuple(p for p in exclude_prefixes if p)
+        # 中文关键词没有大小写之分，此时不用 IGNORECASE，匹配更快
+        caseless = all(s.lower() == s.upper() for s in self.keywords + self.exclude_prefixes)
+        flags = 0 if caseless else re.IGNORECASE
+
+        self._keyword = None
+        self._search = None
+        if len(self.keywords) == 1 and caseless:
+            # 单个无大小写关键词时，子串查找比正则更快
+            self._keyword = self.keywords[0]
+        elif self.keywords:
+            self._search = re.compile('|'.join(map(re.escape, self.keywords)), flags).search
+
+        self._exclude = None
+        if self.exclude_prefixes:
+            self._exclude = re.compile('|'.join(map(re.escape, self.exclude_prefixes)), flags).match
+
+    def matches(self, text: str) -> bool:
+        """消息是否包含触发词且不以排除前缀开头"""
+        if not text:
+            return False
+        if self._keyword is not None:
+            if self._keyword not in text:
+                return False
+        elif self._search is None or self._search(text) is None:
+            return False
+        return self._exclude is None or self._exclude(text) is None
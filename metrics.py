@@ -0,0 +1,112 @@
+import time
+from bisect import bisect_left
+
+# 耗时直方图的桶上界（秒），覆盖从内存判断到 send_like 超时的范围
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class LatencyHistogram:
+    """固定分桶的耗时直方图，记录一次只是一次二分查找和两次加法"""
+
+    __slots__ = ('counts', 'count', 'total', 'max')
+
+    def __init__(self):
+        # 最后一个桶为 +Inf
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q: float) -> float:
+        """分位数的估计值（所在桶的上界，落在 +Inf 桶时取最大值）"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def as_dict(self) -> dict:
+        return {
+            'count': self.count,
+            'avg_ms': self.total / self.count * 1000 if self.count else 0.0,
+            'p50_ms': self.quantile(0.5) * 1000,
+            'p99_ms': self.quantile(0.99) * 1000,
+            'max_ms': self.max * 1000,
+        }
+
+
+class PluginMetrics:
+    """插件的进程内指标：各阶段耗时直方图和按平台计数的事件
+
+    阶段（stage）：prefilter（关键词匹配，抽样计时）、dedup（今天是否已点赞）、
+    send_like（调度队列 + 协议端调用）、persist（写入点赞记录）。
+    事件（event）：trigger、success、limit、failed、rejected 等，按平台分别计数。
+    """
+
+    STAGES = ('prefilter', 'dedup', 'send_like', 'persist')
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.stages = {stage: LatencyHistogram() for stage in self.STAGES}
+        # (事件, 平台) -> 次数
+        self.counters = {}
+
+    def observe(self, stage: str, seconds: float):
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            histogram = self.stages[stage] = LatencyHistogram()
+        histogram.observe(seconds)
+
+    def inc(self, event: str, platform: str = '', amount: int = 1):
+        key = (event, platform)
+        self.counters[key] = self.counters.get(key, 0) + amount
+
+    def snapshot(self) -> dict:
+        return {
+            'uptime_seconds': time.time() - self.started_at,
+            'stages': {stage: histogram.as_dict() for stage, histogram in self.stages.items()},
+            'counters': {f"{event}{{{platform}}}" if platform else event: value
+                         for (event, platform), value in sorted(self.counters.items())},
+        }
+
+    def to_prometheus(self, gauges: list = (), prefix: str = 'random_likes') -> str:
+        """Prometheus 文本格式；gauges 为额外的 (名称, 标签字典, 值) 列表"""
+        lines = [f"# TYPE {prefix}_stage_seconds histogram"]
+        for stage, histogram in self.stages.items():
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, histogram.counts):
+                cumulative += count
+                lines.append(f'{prefix}_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'{prefix}_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {histogram.count}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{stage}"}} {histogram.total}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{stage}"}} {histogram.count}')
+        lines.append(f"# TYPE {prefix}_events_total counter")
+        for (event, platform), value in sorted(self.counters.items()):
+            lines.append(f'{prefix}_events_total{{event="{event}",platform="{_escape(platform)}"}} {value}')
+        declared = set()
+        for name, labels, value in gauges:
+            if name not in declared:
+                lines.append(f"# TYPE {prefix}_{name} gauge")
+                declared.add(name)
+            label_text = ",".join(f'{key}="{_escape(label)}"' for key, label in labels.items())
+            lines.append(f"{prefix}_{name}{{{label_text}}} {float(value)}" if label_text
+                         else f"{prefix}_{name} {float(value)}")
+        lines.append(f"# TYPE {prefix}_uptime_seconds gauge")
+        lines.append(f"{prefix}_uptime_seconds {time.time() - self.started_at}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
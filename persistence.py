@@ -0,0 +1,145 @@
+import asyncio
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from astrbot.api import logger
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class AsyncFileIO:
+    """在专用线程池中执行阻塞的文件操作，同一文件上的操作按提交顺序串行执行"""
+
+    def __init__(self, max_workers: int = 2):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='random_likes_io')
+        self._locks = {}
+
+    def lock(self, path: str) -> asyncio.Lock:
+        """获取文件对应的锁（需要把多步操作作为一个整体时使用）"""
+        lock = self._locks.get(path)
+        if lock is None:
+            lock = self._locks[path] = asyncio.Lock()
+        return lock
+
+    async def submit(self, func, *args):
+        """在线程池中执行 func，不加锁（调用方已持有文件锁时使用）"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    async def run(self, path: str, func, *args):
+        """持有 path 的文件锁，在线程池中执行 func"""
+        async with self.lock(path):
+            return await self.submit(func, *args)
+
+    async def read_json(self, path: str, default=None):
+        """读取 JSON 文件，文件不存在时返回 default"""
+        return await self.run(path, read_json_file, path, default)
+
+    async def write_json(self, path: str, data):
+        """原子写入 JSON 文件"""
+        await self.run(path, atomic_write_json, path, data)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+
+class InterProcessLock:
+    """基于 lock 文件的进程间咨询锁
+
+    acquire()/release() 会阻塞，应通过 AsyncFileIO.submit() 在线程池中调用。
+    锁文件本身还可以保存一小段内容（例如代数），读写只应在持有锁时进行。
+    Windows 下没有共享锁，shared=True 时也按排他锁处理。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    def acquire(self, shared: bool = False):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        f = open(self.path, 'a+b')
+        try:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        except BaseException:
+            f.close()
+            raise
+        self._file = f
+
+    def release(self):
+        f = self._file
+        if f is None:
+            return
+        self._file = None
+        try:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            f.close()
+
+    def read(self) -> bytes:
+        self._file.seek(0)
+        return self._file.read()
+
+    def write(self, data: bytes):
+        self._file.seek(0)
+        self._file.truncate()
+        self._file.write(data)
+        self._file.flush()
+
+
+def read_json_file(path: str, default=None):
+    if not os.path.exists(path):
+        return default
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def atomic_write_json(path: str, data, indent=None):
+    """写入同目录临时文件后 os.replace，避免写到一半时崩溃损坏原文件"""
+    def write(f):
+        if indent is None:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+        else:
+            json.dump(data, f, ensure_ascii=False, indent=indent)
+    _atomic_write(path, write)
+
+
+def atomic_write_text(path: str, text: str):
+    """原子地写入文本文件"""
+    _atomic_write(path, lambda f: f.write(text))
+
+
+def atomic_write_binary(path: str, write):
+    """原子地写入二进制文件，write(f) 向以 'wb' 打开的临时文件写入内容"""
+    _atomic_write(path, write, binary=True)
+
+
+def _atomic_write(path: str, write, binary: bool = False):
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with (open(tmp_path, 'wb') if binary else open(tmp_path, 'w', encoding='utf-8')) as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        logger.debug(f"写入 {path} 失败，已清理临时文件")
+        raise
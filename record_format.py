@@ -0,0 +1,412 @@
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from itertools import compress
+from datetime import date, datetime
+
+from .persistence import atomic_write_binary
+
+
+class LikeRecord:
+    """单条点赞记录：日序号（date.toordinal()）、点赞次数、记录时间（Unix 秒）
+
+    记录创建后不再修改，更新时整体替换，因此可以在线程池中安全地序列化快照。
+    """
+
+    __slots__ = ('day', 'count', 'timestamp')
+
+    def __init__(self, day: int, count: int, timestamp: int = 0):
+        self.day = day
+        self.count = count
+        self.timestamp = timestamp
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        """从 JSON 格式 {'date', 'count', 'timestamp'} 转换，日期无法解析时返回 None"""
+        try:
+            day = date.fromisoformat(data['date']).toordinal()
+        except Exception:
+            return None
+        timestamp = 0
+        if data.get('timestamp'):
+            try:
+                timestamp = int(datetime.fromisoformat(data['timestamp']).timestamp())
+            except (TypeError, ValueError):
+                pass
+        return cls(day, int(data.get('count', 0)), timestamp)
+
+    def to_dict(self) -> dict:
+        return {
+            'date': date.fromordinal(self.day).isoformat(),
+            'count': self.count,
+            'timestamp': datetime.fromtimestamp(self.timestamp).isoformat() if self.timestamp else None
+        }
+
+    def __eq__(self, other):
+        return (isinstance(other, LikeRecord) and self.day == other.day
+                and self.count == other.count and self.timestamp == other.timestamp)
+
+    def __repr__(self):
+        return f"LikeRecord(day={self.day}, count={self.count}, timestamp={self.timestamp})"
+
+
+def records_from_json(data: dict) -> dict:
+    """JSON 格式的 {user_id: dict} 转为 {user_id: LikeRecord}，跳过无效记录"""
+    records = {}
+    if not isinstance(data, dict):
+        return records
+    for user_id, item in data.items():
+        record = LikeRecord.from_dict(item) if isinstance(item, dict) else None
+        if record is not None:
+            records[user_id] = record
+    return records
+
+
+def records_to_json(records) -> dict:
+    """{user_id: LikeRecord} 或 RecordTable 转为 JSON 格式"""
+    return {user_id: record.to_dict() for user_id, record in records.items()}
+
+
+# 列中已删除的行的日序号（date.toordinal() 最小为 1）
+DELETED = 0
+_INT64_MIN = -2 ** 63
+_INT64_MAX = 2 ** 63 - 1
+
+
+def _column_key(user_id: str):
+    """能存入整数列的 user_id（规范的 int64 十进制字符串）转为整数，否则返回 None"""
+    try:
+        key = int(user_id)
+    except (TypeError, ValueError):
+        return None
+    if str(key) != user_id or not _INT64_MIN <= key <= _INT64_MAX:
+        return None
+    return key
+
+
+def _fits_columns(record: LikeRecord) -> bool:
+    return (type(record.day) is int and DELETED < record.day < 2 ** 31
+            and type(record.count) is int and 0 <= record.count <= 255
+            and type(record.timestamp) is int and _INT64_MIN <= record.timestamp <= _INT64_MAX)
+
+
+class RecordTable:
+    """user_id -> LikeRecord 的紧凑映射
+
+    记录按列保存：按 user_id 排序的 int64 数组，以及平行的日序号 int32、次数 uint8、
+    时间 int64 数组，查找用 bisect，每人约 21 字节。已有用户的写入直接改列；新用户和
+    无法放入列的记录（非整数 user_id、次数超过 255）放在 overlay 字典中，删除只把列中
+    的日序号标记为 DELETED。overlay 和已删除的行累积到一定数量后（needs_compact()）
+    由调用方在线程池中对副本 compact()，期间的变更用 track_changes()/replay() 补上。
+    同时维护每个日序号的记录数，过期清理没有可删的记录时不扫描列。
+    """
+
+    # overlay 和已删除行的数量超过 COMPACT_MIN + 列长度 / 4 时需要重建列
+    COMPACT_MIN = 4096
+
+    def __init__(self, user_ids: array = None, days: array = None, counts: array = None,
+                 timestamps: array = None):
+        """列必须按 user_id 升序且没有重复"""
+        self._ids = user_ids if user_ids is not None else array('q')
+        self._days = days if days is not None else array('i')
+        self._counts = counts if counts is not None else array('B')
+        self._timestamps = timestamps if timestamps is not None else array('q')
+        self._overlay = {}
+        # 合并后仍留在 overlay 中的记录数，不计入合并阈值
+        self._overlay_floor = 0
+        # 在线程池中加载时分段统计，段之间其他线程（事件循环）有机会拿到 GIL
+        self._day_counts = Counter()
+        for start in range(0, len(self._days), 65536):
+            self._day_counts.update(self._days[start:start + 65536])
+        self._dead = self._day_counts.pop(DELETED, 0)
+        # track_changes() 之后变更过的 user_id
+        self._changed = None
+
+    @classmethod
+    def from_records(cls, records: dict):
+        """由 {user_id: LikeRecord} 建表"""
+        rows = []
+        overlay = {}
+        for user_id, record in records.items():
+            key = _column_key(user_id)
+            if key is None or not _fits_columns(record):
+                overlay[user_id] = record
+            else:
+                rows.append((key, record))
+        rows.sort(key=lambda row: row[0])
+        table = cls(array('q', [key for key, _ in rows]), array('i', [record.day for _, record in rows]),
+                    array('B', [record.count for _, record in rows]),
+                    array('q', [record.timestamp for _, record in rows]))
+        for user_id, record in overlay.items():
+            table._overlay[user_id] = record
+            table._day_counts[record.day] += 1
+        table._overlay_floor = len(overlay)
+        return table
+
+    def _position(self, key: int) -> int:
+        """key 在列中的行号（含已删除的行），不存在时返回 -1"""
+        ids = self._ids
+        i = bisect_left(ids, key)
+        return i if i < len(ids) and ids[i] == key else -1
+
+    def get(self, user_id: str, default=None):
+        record = self._overlay.get(user_id)
+        if record is not None:
+            return record
+        key = _column_key(user_id)
+        if key is None:
+            return default
+        i = self._position(key)
+        if i < 0 or self._days[i] == DELETED:
+            return default
+        return LikeRecord(self._days[i], self._counts[i], self._timestamps[i])
+
+    def __getitem__(self, user_id: str) -> LikeRecord:
+        record = self.get(user_id)
+        if record is None:
+            raise KeyError(user_id)
+        return record
+
+    def __contains__(self, user_id: str) -> bool:
+        return self.get(user_id) is not None
+
+    def __setitem__(self, user_id: str, record: LikeRecord):
+        old = self._overlay.pop(user_id, None)
+        key = _column_key(user_id) if old is None else None
+        i = self._position(key) if key is not None else -1
+        if i >= 0 and _fits_columns(record):
+            old_day = self._days[i]
+            if old_day == DELETED:
+                self._dead -= 1
+            else:
+                old = LikeRecord(old_day, 0)
+            self._days[i] = record.day
+            self._counts[i] = record.count
+            self._timestamps[i] = record.timestamp
+        else:
+            if i >= 0 and self._days[i] != DELETED:
+                # 放不进列，从列中删除后改存到 overlay
+                old = LikeRecord(self._days[i], 0)
+                self._days[i] = DELETED
+                self._dead += 1
+            self._overlay[user_id] = record
+        if old is not None:
+            self._uncount(old.day)
+        self._day_counts[record.day] += 1
+        if self._changed is not None:
+            self._changed.add(user_id)
+
+    def pop(self, user_id: str, default=None):
+        record = self._overlay.pop(user_id, None)
+        if record is None:
+            key = _column_key(user_id)
+            i = self._position(key) if key is not None else -1
+            if i < 0 or self._days[i] == DELETED:
+                return default
+            record = LikeRecord(self._days[i], self._counts[i], self._timestamps[i])
+            self._days[i] = DELETED
+            self._dead += 1
+        self._uncount(record.day)
+        if self._changed is not None:
+            self._changed.add(user_id)
+        return record
+
+    def __delitem__(self, user_id: str):
+        if self.pop(user_id) is None:
+            raise KeyError(user_id)
+
+    def _uncount(self, day: int):
+        remaining = self._day_counts[day] - 1
+        if remaining:
+            self._day_counts[day] = remaining
+        else:
+            del self._day_counts[day]
+
+    def __len__(self) -> int:
+        return len(self._ids) - self._dead + len(self._overlay)
+
+    def __iter__(self):
+        return (user_id for user_id, _ in self.items())
+
+    def items(self):
+        """逐条产出 (user_id, LikeRecord)，先列后 overlay"""
+        for key, day, count, timestamp in zip(self._ids, self._days, self._counts, self._timestamps):
+            if day != DELETED:
+                yield str(key), LikeRecord(day, count, timestamp)
+        yield from self._overlay.items()
+
+    def day_totals(self) -> dict:
+        """日序号 -> (记录数, 总次数)，没有保存过每日统计时用于估算"""
+        likes = Counter()
+        for day, count in zip(self._days, self._counts):
+            likes[day] += count
+        for record in self._overlay.values():
+            likes[record.day] += record.count
+        return {day: (users, likes[day]) for day, users in self._day_counts.items()}
+
+    def copy(self):
+        """复制一份（数组整块复制），交给线程池处理时不受后续写入影响"""
+        table = RecordTable.__new__(RecordTable)
+        table._ids = self._ids[:]
+        table._days = self._days[:]
+        table._counts = self._counts[:]
+        table._timestamps = self._timestamps[:]
+        table._overlay = dict(self._overlay)
+        table._overlay_floor = self._overlay_floor
+        table._dead = self._dead
+        table._day_counts = Counter(self._day_counts)
+        table._changed = None
+        return table
+
+    def expire_steps(self, cutoff: int, step: int = 16384):
+        """分段删除日序号早于 cutoff 的记录，每处理一段产出该段删除的条数
+
+        调用方可以在段之间让出事件循环：列只会就地修改，行号在此期间不变。
+        """
+        if not any(day < cutoff for day in self._day_counts):
+            return
+        expired = [user_id for user_id, record in self._overlay.items() if record.day < cutoff]
+        for user_id in expired:
+            self.pop(user_id)
+        yield len(expired)
+        ids, days = self._ids, self._days
+        for start in range(0, len(days), step):
+            removed = 0
+            for i in range(start, min(start + step, len(days))):
+                day = days[i]
+                if day < cutoff and day != DELETED:
+                    days[i] = DELETED
+                    self._uncount(day)
+                    removed += 1
+                    if self._changed is not None:
+                        self._changed.add(str(ids[i]))
+            self._dead += removed
+            yield removed
+
+    def expire(self, cutoff: int) -> int:
+        """一次性删除日序号早于 cutoff 的记录，返回删除条数"""
+        return sum(self.expire_steps(cutoff))
+
+    def needs_compact(self) -> bool:
+        return len(self._overlay) - self._overlay_floor + self._dead > self.COMPACT_MIN + len(self._ids) // 4
+
+    def compact(self):
+        """把 overlay 中能放入列的记录合并进列，并去掉已删除的行（O(n)，应在副本上于线程池中执行）"""
+        ids, days, counts, timestamps = self._ids, self._days, self._counts, self._timestamps
+        if self._dead:
+            # DELETED 为 0，日序号列本身就是“是否保留”的选择器
+            ids, counts, timestamps, days = (array(column.typecode, compress(column, days))
+                                             for column in (ids, counts, timestamps, days))
+        moved = sorted((key, user_id) for key, user_id in
+                       ((_column_key(user_id), user_id) for user_id, record in self._overlay.items()
+                        if _fits_columns(record))
+                       if key is not None)
+        if moved:
+            new_ids, new_days, new_counts, new_timestamps = array('q'), array('i'), array('B'), array('q')
+            start = 0
+            for key, user_id in moved:
+                # 两个新行之间的列整段复制，只有新行逐个追加
+                end = bisect_left(ids, key, start)
+                new_ids.extend(ids[start:end])
+                new_days.extend(days[start:end])
+                new_counts.extend(counts[start:end])
+                new_timestamps.extend(timestamps[start:end])
+                record = self._overlay.pop(user_id)
+                new_ids.append(key)
+                new_days.append(record.day)
+                new_counts.append(record.count)
+                new_timestamps.append(record.timestamp)
+                start = end
+            new_ids.extend(ids[start:])
+            new_days.extend(days[start:])
+            new_counts.extend(counts[start:])
+            new_timestamps.extend(timestamps[start:])
+            ids, days, counts, timestamps = new_ids, new_days, new_counts, new_timestamps
+        self._ids, self._days, self._counts, self._timestamps = ids, days, counts, timestamps
+        self._dead = 0
+        self._overlay_floor = len(self._overlay)
+        return self
+
+    def track_changes(self):
+        """开始记录变更过的 user_id（在副本上 compact 期间使用）"""
+        self._changed = set()
+
+    def take_changes(self) -> set:
+        """停止记录并返回 track_changes() 之后变更过的 user_id"""
+        changed, self._changed = self._changed or set(), None
+        return changed
+
+    def replay(self, source, user_ids):
+        """把 source 中这些 user_id 的当前记录（或删除）应用到本表"""
+        for user_id in user_ids:
+            record = source.get(user_id)
+            if record is None:
+                self.pop(user_id)
+            else:
+                self[user_id] = record
+
+
+# 二进制快照：文件头 + 四个定长数组（小端）
+#   magic(4s) version(H) reserved(H) count(Q)
+#   user_id int64[count] | day int32[count] | count uint8[count] | timestamp int64[count]
+# 版本 2 起 user_id 按升序排列，读取后直接作为 RecordTable 的列；版本 1 读取时排序
+BINARY_MAGIC = b'RLKB'
+BINARY_VERSION = 2
+_HEADER = struct.Struct('<4sHHQ')
+_LITTLE_ENDIAN = sys.byteorder == 'little'
+
+
+def write_binary_snapshot(path: str, records):
+    """写入定长二进制快照（临时文件 + 重命名）
+
+    records 为 RecordTable 或 {user_id: LikeRecord}，写入前会就地合并。user_id 不是
+    整数时抛出 ValueError，次数超出 uint8 时抛出 OverflowError。
+    """
+    table = records if isinstance(records, RecordTable) else RecordTable.from_records(records)
+    table.compact()
+    if table._overlay:
+        user_id, record = next(iter(table._overlay.items()))
+        if _column_key(user_id) is None:
+            raise ValueError(f"user_id 不是整数: {user_id!r}")
+        raise OverflowError(f"点赞次数超出范围: {record.count}")
+    columns = (table._ids, table._days, table._counts, table._timestamps)
+    if not _LITTLE_ENDIAN:
+        columns = [column[:] for column in columns]
+        for column in columns:
+            column.byteswap()
+
+    def write(f):
+        f.write(_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, 0, len(table._ids)))
+        for column in columns:
+            column.tofile(f)
+    atomic_write_binary(path, write)
+
+
+def read_binary_snapshot(path: str) -> RecordTable:
+    """一次读入整个二进制快照，各段直接转为 RecordTable 的列"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    magic, version, _, total = _HEADER.unpack_from(data, 0)
+    if magic != BINARY_MAGIC or version not in (1, BINARY_VERSION):
+        raise ValueError(f"不支持的点赞记录快照格式: {path}")
+
+    view = memoryview(data)
+    offset = _HEADER.size
+    columns = []
+    for typecode in ('q', 'i', 'B', 'q'):
+        column = array(typecode)
+        size = column.itemsize * total
+        if offset + size > len(data):
+            raise ValueError(f"点赞记录快照不完整: {path}")
+        column.frombytes(view[offset:offset + size])
+        if not _LITTLE_ENDIAN and column.itemsize > 1:
+            column.byteswap()
+        columns.append(column)
+        offset += size
+    if version == 1:
+        # 旧版本按写入顺序保存
+        order = sorted(range(total), key=columns[0].__getitem__)
+        columns = [array(column.typecode, [column[i] for i in order]) for column in columns]
+    return RecordTable(*columns)
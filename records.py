@@ -0,0 +1,971 @@
+import asyncio
+import json
+import os
+import sqlite3
+from datetime import date
+
+from astrbot.api import logger
+
+from .persistence import AsyncFileIO, InterProcessLock, atomic_write_json, read_json_file
+from .record_format import (
+    LikeRecord, RecordTable, records_from_json, records_to_json, read_binary_snapshot, write_binary_snapshot
+)
+
+
+class LikeRecordBackend:
+    """点赞记录存储后端的公共接口
+
+    单条记录以 LikeRecord 传递，查询接口中的 day 为 date.toordinal() 得到的整数日序号。
+    all_records()/replace() 使用 JSON 格式 {user_id: {'date', 'count', 'timestamp'}}，
+    用于导入导出。
+    所有可能触及磁盘的操作都是协程，阻塞部分在 AsyncFileIO 的线程池中执行。
+    """
+
+    async def load(self):
+        """启动时加载/打开存储"""
+        raise NotImplementedError
+
+    async def all_records(self) -> dict:
+        """全部记录的 JSON 格式（用于兼容旧接口和导出）"""
+        raise NotImplementedError
+
+    async def get(self, user_id: str):
+        """用户的 LikeRecord，不存在时返回 None"""
+        raise NotImplementedError
+
+    async def set(self, user_id: str, record: LikeRecord):
+        raise NotImplementedError
+
+    async def set_many(self, records: dict):
+        """批量写入 {user_id: LikeRecord}，后端应尽量合并为一次提交"""
+        for user_id, record in records.items():
+            await self.set(user_id, record)
+
+    async def delete(self, user_id: str):
+        """删除单条记录（不存在时忽略）"""
+        raise NotImplementedError
+
+    async def replace(self, records: dict):
+        """用 JSON 格式的记录整体替换全部记录（导入）"""
+        raise NotImplementedError
+
+    async def is_liked_on(self, user_id: str, day: int) -> bool:
+        """用户在指定日（日序号）是否已有点赞记录"""
+        raise NotImplementedError
+
+    async def day_stats(self, day: int) -> tuple:
+        """指定日期的 (点赞人数, 总点赞数)，用户之后再次点赞不影响以前各天的统计"""
+        raise NotImplementedError
+
+    async def recent_stats(self, today: int, days: int) -> list:
+        """最近 days 天（含今天）每天的 (日序号, 点赞人数, 总点赞数)，按日期升序"""
+        return [(day, *await self.day_stats(day)) for day in range(today - days + 1, today + 1)]
+
+    async def user_count(self) -> int:
+        """记录中的总用户数"""
+        raise NotImplementedError
+
+    async def remove_expired(self, retention_days: int, today: int) -> int:
+        """删除早于 today - retention_days 的记录，返回删除条数"""
+        raise NotImplementedError
+
+    async def close(self):
+        """落盘并释放资源"""
+
+
+def _daily_change(old_day, new_day) -> tuple:
+    """记录从 old_day 改为 new_day（None 表示没有记录）时，返回 (是否撤销旧日统计, 是否计入新日统计)
+
+    改到更晚的日期是用户新的一次点赞，旧日期的统计作为历史保留；同一天的覆盖、删除
+    和回滚到更早的记录都视为撤销旧记录，回滚到的记录当时已经计入过，不再重复计入。
+    """
+    undo = old_day is not None and (new_day is None or new_day <= old_day)
+    count = new_day is not None and (old_day is None or new_day >= old_day)
+    return undo, count
+
+
+class DailyAggregates:
+    """按日统计的点赞人数与总点赞数，环形缓冲只保留最近 size 天
+
+    由存储在写入路径上增量维护（见 _daily_change），查询是 O(1)。每个用户只保留最新
+    一条记录，以前各天的统计无法从记录重建，随快照一起保存（rows()/from_rows()）。
+    """
+
+    def __init__(self, size: int):
+        self.size = max(1, size)
+        self._days = [None] * self.size
+        self._users = [0] * self.size
+        self._likes = [0] * self.size
+
+    def reset(self):
+        self._days = [None] * self.size
+        self._users = [0] * self.size
+        self._likes = [0] * self.size
+
+    def add(self, day: int, likes: int, users: int = 1):
+        slot = day % self.size
+        current = self._days[slot]
+        if current != day:
+            if current is not None and current > day:
+                # 该日已滑出窗口
+                return
+            self._days[slot] = day
+            self._users[slot] = 0
+            self._likes[slot] = 0
+        self._users[slot] += users
+        self._likes[slot] += likes
+
+    def remove(self, day: int, likes: int):
+        slot = day % self.size
+        if self._days[slot] == day:
+            self._users[slot] -= 1
+            self._likes[slot] -= likes
+
+    def change(self, old: LikeRecord, new: LikeRecord):
+        """用户的记录从 old 改为 new（None 表示没有记录）"""
+        undo, count = _daily_change(old.day if old is not None else None, new.day if new is not None else None)
+        if undo:
+            self.remove(old.day, old.count)
+        if count:
+            self.add(new.day, new.count)
+
+    def rows(self) -> list:
+        """[[日序号, 点赞人数, 总点赞数], ...]，用于保存"""
+        return sorted([day, users, likes] for day, users, likes in zip(self._days, self._users, self._likes)
+                      if day is not None)
+
+    @classmethod
+    def from_rows(cls, size: int, rows: list):
+        aggregates = cls(size)
+        for day, users, likes in rows:
+            aggregates.add(int(day), int(likes), int(users))
+        return aggregates
+
+    def get(self, day: int) -> tuple:
+        slot = day % self.size
+        if self._days[slot] != day:
+            return 0, 0
+        return self._users[slot], self._likes[slot]
+
+
+class LikeRecordStore(LikeRecordBackend):
+    """点赞记录的内存存储，变更由后台任务延迟批量写回磁盘
+
+    记录保存在按列存储的 RecordTable 中（每人约 21 字节，按 user_id 二分查找），
+    它同时维护每天的记录数，没有过期记录时清理不扫描；新用户和删除累积到一定数量后
+    在线程池中重建列。每日人数和次数由
+    DailyAggregates 随写入增量更新，统计查询不扫描记录，并随快照写入同名的
+    .daily.json 文件。
+
+    快照格式由 snapshot_format 决定：'json' 写入 file_path，'binary' 写入同名的
+    .bin 定长二进制文件（加载快、体积小）。两种快照都存在时读取较新的一份，
+    因此切换格式后会自动导入旧格式的数据。
+    """
+
+    # 写盘失败后的重试间隔上限（秒），间隔从 flush_delay 开始逐次加倍
+    FLUSH_RETRY_MAX = 60.0
+
+    def __init__(self, file_path: str, io: AsyncFileIO, flush_delay: float = 2.0,
+                 retention_days: int = 7, snapshot_format: str = 'json'):
+        self.file_path = file_path
+        self.binary_file = os.path.splitext(file_path)[0] + '.bin'
+        self.daily_file = os.path.splitext(file_path)[0] + '.daily.json'
+        self.snapshot_format = snapshot_format
+        self.io = io
+        # 写回防抖间隔（秒），期间的多次变更合并为一次写盘
+        self.flush_delay = flush_delay
+        self._records = RecordTable()
+        # 保留窗口内每天的点赞人数/次数
+        self._aggregates = DailyAggregates(retention_days + 1)
+        self._dirty = False
+        self._flush_task = None
+        self._pending_write = None
+        self._compact_task = None
+        # 累计写盘失败次数和当前的重试间隔
+        self._flush_failures = 0
+        self._retry_delay = 0.0
+
+    @property
+    def snapshot_file(self) -> str:
+        return self.binary_file if self.snapshot_format == 'binary' else self.file_path
+
+    async def load(self):
+        """从磁盘加载全部记录到内存（仅在启动时调用一次）"""
+        records, aggregates = RecordTable(), None
+        try:
+            records, source, aggregates = await self.io.run(self.snapshot_file, self._load_snapshot)
+            if source and source != self.snapshot_file:
+                # 从另一种格式导入，尽快写出当前格式的快照
+                logger.info(f"已从 {source} 导入点赞记录")
+                self._dirty = True
+        except Exception as e:
+            logger.error(f"加载点赞记录失败: {e}")
+        self._records = records
+        if aggregates is None:
+            self._rebuild_aggregates()
+        else:
+            self._aggregates = aggregates
+        logger.info(f"已加载 {len(self._records)} 条点赞记录")
+
+    def _load_snapshot(self) -> tuple:
+        """读取快照和每日统计（在线程池中执行，记录很多时不阻塞事件循环）"""
+        records, source = self._read_snapshot()
+        return records, source, self._build_aggregates(records, read_json_file(self.daily_file, None))
+
+    def _read_snapshot(self) -> tuple:
+        """读取较新的一份快照（同样新时优先当前格式），返回 (记录, 实际读取的文件)"""
+        readers = [(self.file_path, self._read_json_snapshot), (self.binary_file, read_binary_snapshot)]
+        if self.snapshot_format == 'binary':
+            readers.reverse()
+        existing = [(os.path.getmtime(path), -i, path, reader)
+                    for i, (path, reader) in enumerate(readers) if os.path.exists(path)]
+        if not existing:
+            return RecordTable(), None
+        _, _, path, reader = max(existing)
+        return reader(path), path
+
+    @staticmethod
+    def _read_json_snapshot(path: str) -> RecordTable:
+        return RecordTable.from_records(records_from_json(read_json_file(path, {})))
+
+    def _rebuild_aggregates(self):
+        """没有保存过的每日统计时按记录估算"""
+        self._aggregates = self._build_aggregates(self._records)
+
+    def _build_aggregates(self, records: RecordTable, daily_rows: list = None) -> DailyAggregates:
+        if daily_rows is not None:
+            return DailyAggregates.from_rows(self._aggregates.size, daily_rows)
+        aggregates = DailyAggregates(self._aggregates.size)
+        for day, (users, likes) in sorted(records.day_totals().items()):
+            aggregates.add(day, likes, users)
+        return aggregates
+
+    def _put(self, user_id: str, record: LikeRecord):
+        self._aggregates.change(self._records.get(user_id), record)
+        self._records[user_id] = record
+        self._schedule_compaction()
+
+    def _pop(self, user_id: str) -> bool:
+        record = self._records.pop(user_id)
+        if record is None:
+            return False
+        self._aggregates.change(record, None)
+        self._schedule_compaction()
+        return True
+
+    def _schedule_compaction(self):
+        if self._compact_task is None and self._records.needs_compact():
+            self._compact_task = asyncio.get_running_loop().create_task(self._compact_records())
+
+    async def _compact_records(self):
+        """在线程池中重建记录表的列（O(n)），期间的写入在完成后重新应用"""
+        records = self._records
+        records.track_changes()
+        try:
+            compacted = await self.io.submit(RecordTable.compact, records.copy())
+        except Exception as e:
+            logger.error(f"整理点赞记录失败: {e}")
+            return
+        finally:
+            changed = records.take_changes()
+            self._compact_task = None
+        # 期间记录被整体替换（导入、重新加载共享快照）时放弃本次结果
+        if records is self._records:
+            compacted.replay(records, changed)
+            self._records = compacted
+
+    async def all_records(self) -> dict:
+        return records_to_json(self._records)
+
+    async def get(self, user_id: str):
+        return self._records.get(user_id)
+
+    async def is_liked_on(self, user_id: str, day: int) -> bool:
+        record = self._records.get(user_id)
+        return record is not None and record.day == day
+
+    async def set(self, user_id: str, record: LikeRecord):
+        """写入单条记录并安排延迟写盘"""
+        self._put(user_id, record)
+        self._mark_dirty()
+
+    async def set_many(self, records: dict):
+        for user_id, record in records.items():
+            self._put(user_id, record)
+        if records:
+            self._mark_dirty()
+
+    async def delete(self, user_id: str):
+        if self._pop(user_id):
+            self._mark_dirty()
+
+    async def replace(self, records: dict):
+        """整体替换记录并安排延迟写盘"""
+        self._records = RecordTable.from_records(records_from_json(records))
+        self._rebuild_aggregates()
+        self._mark_dirty()
+
+    async def day_stats(self, day: int) -> tuple:
+        return self._aggregates.get(day)
+
+    async def user_count(self) -> int:
+        return len(self._records)
+
+    async def remove_expired(self, retention_days: int, today: int) -> int:
+        """删除超过保留天数的记录并安排写盘，返回删除条数
+
+        分段扫描记录，每段之间让出一次事件循环，记录很多时不会长时间阻塞消息处理。
+        """
+        cutoff = today - retention_days
+        removed = 0
+        while True:
+            # 让出期间记录可能被整体替换，此时在新的记录上重新清理
+            records = self._records
+            for count in records.expire_steps(cutoff):
+                removed += count
+                await asyncio.sleep(0)
+                if records is not self._records:
+                    break
+            else:
+                break
+        if removed:
+            self._schedule_compaction()
+            self._mark_dirty()
+        return removed
+
+    def _prune(self, cutoff: int) -> int:
+        """仅在内存中删除早于 cutoff 的记录"""
+        removed = self._records.expire(cutoff)
+        if removed:
+            self._schedule_compaction()
+        return removed
+
+    def _mark_dirty(self, delay: float = None):
+        self._dirty = True
+        if self._flush_task is not None and not self._flush_task.done():
+            return
+        delay = self.flush_delay if delay is None else delay
+        self._flush_task = asyncio.get_running_loop().create_task(self._delayed_flush(delay))
+
+    async def _delayed_flush(self, delay: float):
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            return
+        failures = self._flush_failures
+        # 写盘开始后不再响应取消，close() 会等待这次写入完成
+        self._pending_write = asyncio.ensure_future(self.flush())
+        await asyncio.shield(self._pending_write)
+        self._flush_task = None
+        if not self._dirty:
+            self._retry_delay = 0.0
+        elif self._flush_failures > failures:
+            # 写盘失败，退避后重试
+            self._retry_delay = min(max(self._retry_delay * 2, self.flush_delay), self.FLUSH_RETRY_MAX)
+            self._mark_dirty(self._retry_delay)
+        else:
+            # 写盘期间又有新的变更，此时 _mark_dirty() 看到的是本任务，没有另行安排写回
+            self._mark_dirty()
+
+    async def flush(self):
+        """将内存记录原子地写回磁盘（临时文件 + 重命名）"""
+        if not self._dirty:
+            return
+        # 先清除脏标记，写盘期间的新变更会重新置位，由 _delayed_flush 结束时安排写回
+        self._dirty = False
+        # 在事件循环线程中复制，线程池中序列化时不会与新的写入冲突
+        snapshot = self._records.copy()
+        daily = self._aggregates.rows()
+        try:
+            await self.io.run(self.snapshot_file, self._write_snapshot, snapshot, daily)
+            logger.debug(f"点赞记录已写回: {self.snapshot_file} ({len(snapshot)} 条)")
+        except Exception as e:
+            self._dirty = True
+            self._flush_failures += 1
+            logger.error(f"保存点赞记录失败: {e}")
+            logger.error(f"目标路径: {self.snapshot_file}")
+
+    def _write_snapshot(self, snapshot: RecordTable, daily: list):
+        """按当前格式写快照，再写每日统计（在线程池中执行）"""
+        if self.snapshot_format == 'binary':
+            try:
+                write_binary_snapshot(self.binary_file, snapshot)
+            except (ValueError, OverflowError) as e:
+                # user_id 不是整数（非 QQ 平台）或数值超出定长字段，此后改用 JSON
+                logger.warning(f"点赞记录无法使用二进制快照，改用 JSON: {e}")
+                self.snapshot_format = 'json'
+        if self.snapshot_format != 'binary':
+            atomic_write_json(self.file_path, records_to_json(snapshot))
+        atomic_write_json(self.daily_file, daily)
+
+    async def close(self):
+        """取消待执行的写回任务并立即写盘"""
+        if self._compact_task is not None:
+            self._compact_task.cancel()
+        task = self._flush_task
+        self._flush_task = None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        if self._pending_write is not None:
+            await self._pending_write
+            self._pending_write = None
+        await self.flush()
+
+
+class JournalLikeRecordStore(LikeRecordStore):
+    """追加日志存储：每次点赞只追加一行日志，日志过大时折叠进快照文件
+
+    日志每行为 [user_id, 日序号, 次数, Unix 秒]，日序号为 null 表示删除。
+    """
+
+    def __init__(self, file_path: str, io: AsyncFileIO, flush_delay: float = 2.0,
+                 compact_bytes: int = 1024 * 1024, retention_days: int = 7, snapshot_format: str = 'json'):
+        super().__init__(file_path, io, flush_delay, retention_days, snapshot_format)
+        self.journal_file = os.path.splitext(file_path)[0] + '.journal'
+        # 日志超过该大小（字节）时触发压缩
+        self.compact_bytes = compact_bytes
+        # 压缩时顺带清理过期记录
+        self.retention_days = retention_days
+        # 日志文件句柄只在持有日志文件锁时于线程池中使用
+        self._journal = None
+        self._journal_size = 0
+
+    async def load(self):
+        """加载快照后重放日志，容忍最后一行写到一半的情况"""
+        await super().load()
+        try:
+            entries, broken, size = await self.io.run(self.journal_file, self._read_journal)
+        except Exception as e:
+            logger.error(f"重放点赞日志失败: {e}")
+            return
+        for user_id, record in entries:
+            if record is None:
+                # 删除标记
+                self._pop(user_id)
+            else:
+                self._put(user_id, record)
+        self._journal_size = size
+        if entries:
+            logger.info(f"已从日志重放 {len(entries)} 条点赞记录")
+        if broken:
+            # 立即压缩，丢弃损坏的行，避免后续追加接在半行后面
+            logger.warning(f"点赞日志中有 {broken} 行无法解析，已忽略")
+            self._dirty = True
+        if self._dirty:
+            await self.flush()
+
+    def _read_journal(self):
+        entries = []
+        broken = 0
+        if not os.path.exists(self.journal_file):
+            return entries, broken, 0
+        with open(self.journal_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.endswith('\n'):
+                    # 进程崩溃时残留的半行
+                    broken += 1
+                    continue
+                try:
+                    user_id, day, count, timestamp = json.loads(line)
+                    entries.append((user_id, _journal_record(day, count, timestamp)))
+                except Exception:
+                    broken += 1
+        return entries, broken, os.path.getsize(self.journal_file)
+
+    async def set(self, user_id: str, record: LikeRecord):
+        """更新内存并追加一行日志（O(1) 写入）"""
+        self._put(user_id, record)
+        await self._append_entries([[user_id, record.day, record.count, record.timestamp]])
+
+    async def set_many(self, records: dict):
+        """更新内存并一次追加全部日志行"""
+        for user_id, record in records.items():
+            self._put(user_id, record)
+        if records:
+            await self._append_entries([[user_id, record.day, record.count, record.timestamp]
+                                        for user_id, record in records.items()])
+
+    async def delete(self, user_id: str):
+        """从内存删除并追加一行删除标记"""
+        if self._pop(user_id):
+            await self._append_entries([[user_id, None, 0, 0]])
+
+    async def _append_entries(self, entries: list):
+        line = ''.join(json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + '\n' for entry in entries)
+        try:
+            written = await self.io.run(self.journal_file, self._append, line)
+        except Exception as e:
+            # 日志写入失败时退回到整体快照写回
+            logger.error(f"追加点赞日志失败: {e}")
+            self._mark_dirty()
+            return
+        self._journal_size += written
+        if self._journal_size >= self.compact_bytes:
+            self._mark_dirty()
+
+    def _append(self, line: str) -> int:
+        if self._journal is None:
+            self._journal = open(self.journal_file, 'a', encoding='utf-8')
+        self._journal.write(line)
+        self._journal.flush()
+        return len(line.encode('utf-8'))
+
+    async def flush(self):
+        """压缩：清理过期记录，写入快照后清空日志"""
+        if not self._dirty:
+            return
+        self._dirty = False
+        # 持有日志锁期间拍快照：此前追加的记录都已在内存中，此后的追加会写入新日志
+        async with self.io.lock(self.journal_file):
+            self._prune(date.today().toordinal() - self.retention_days)
+            snapshot = self._records.copy()
+            daily = self._aggregates.rows()
+            try:
+                await self.io.run(self.snapshot_file, self._compact, snapshot, daily)
+                self._journal_size = 0
+                logger.debug(f"点赞日志已压缩进快照: {self.snapshot_file} ({len(snapshot)} 条)")
+            except Exception as e:
+                self._dirty = True
+                self._flush_failures += 1
+                logger.error(f"压缩点赞日志失败: {e}")
+
+    def _compact(self, snapshot: RecordTable, daily: list):
+        self._write_snapshot(snapshot, daily)
+        # 快照落盘后才截断日志；两步之间崩溃只会重复重放，不会丢数据
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        with open(self.journal_file, 'w', encoding='utf-8'):
+            pass
+
+    async def close(self):
+        await super().close()
+        if self._journal is not None:
+            await self.io.run(self.journal_file, self._journal.close)
+            self._journal = None
+
+
+class SharedLikeRecordStore(JournalLikeRecordStore):
+    """多个 AstrBot 进程共用同一数据目录时的点赞记录存储
+
+    所有进程共享同一份快照和追加日志，读写都在 .lock 文件的咨询锁下进行：
+    追加日志持有排他锁，读取持有共享锁。锁文件中保存快照的代数，每次压缩后加一。
+    每个进程在内存中保留一份缓存，查询前只比较锁文件和日志的大小/mtime，
+    有变化时才在锁内读取新增的日志行；代数变化（其他进程压缩过）时重新加载快照。
+    """
+
+    def __init__(self, file_path: str, io: AsyncFileIO, flush_delay: float = 2.0,
+                 compact_bytes: int = 1024 * 1024, retention_days: int = 7, snapshot_format: str = 'json'):
+        super().__init__(file_path, io, flush_delay, compact_bytes, retention_days, snapshot_format)
+        self.lock_file = os.path.splitext(file_path)[0] + '.lock'
+        # 本地缓存对应的快照代数和已读取到的日志位置
+        self._generation = None
+        self._journal_offset = 0
+        # 上次同步时锁文件和日志的 (大小, mtime)，用于廉价地判断缓存是否过期
+        self._stamp = None
+
+    async def load(self):
+        try:
+            await self._locked(False)
+        except Exception as e:
+            logger.error(f"加载共享点赞记录失败: {e}")
+        logger.info(f"已加载 {len(self._records)} 条共享点赞记录 (代数: {self._generation})")
+
+    async def _refresh(self):
+        """其他进程有写入时同步到本地缓存"""
+        stamp = await self.io.submit(self._stat_stamp)
+        if stamp != self._stamp:
+            await self._locked(False)
+
+    async def _locked(self, exclusive: bool, work=None):
+        """持有进程间锁，先同步其他进程的变更，再执行 work(lock)（协程函数）"""
+        # 取得锁之后不能被取消打断，否则锁会一直留在本进程中
+        return await asyncio.shield(self._locked_inner(exclusive, work))
+
+    async def _locked_inner(self, exclusive: bool, work):
+        async with self.io.lock(self.lock_file):
+            lock = InterProcessLock(self.lock_file)
+            await self.io.submit(lock.acquire, not exclusive)
+            try:
+                self._apply_changes(await self.io.submit(self._read_changes, lock))
+                if work is not None:
+                    return await work(lock)
+            finally:
+                await self.io.submit(lock.release)
+
+    def _stat_stamp(self) -> tuple:
+        stamp = []
+        for path in (self.lock_file, self.journal_file):
+            try:
+                st = os.stat(path)
+                stamp += [st.st_size, st.st_mtime_ns]
+            except FileNotFoundError:
+                stamp += [-1, 0]
+        return tuple(stamp)
+
+    def _read_changes(self, lock: InterProcessLock) -> tuple:
+        """读取本地缓存之后的变更（持有锁时在线程池中执行）"""
+        try:
+            generation = int(lock.read() or 0)
+        except ValueError:
+            generation = 0
+        stamp = self._stat_stamp()
+        records = aggregates = None
+        offset = self._journal_offset
+        if generation != self._generation or stamp[2] < offset:
+            records, _, aggregates = self._load_snapshot()
+            offset = 0
+        entries, broken, offset = self._read_journal_from(offset)
+        return generation, records, aggregates, entries, broken, offset, stamp
+
+    def _read_journal_from(self, offset: int) -> tuple:
+        """从 offset 开始读取完整的日志行，返回 (记录, 无法解析的行数, 新的 offset)"""
+        if not os.path.exists(self.journal_file):
+            return [], 0, 0
+        with open(self.journal_file, 'rb') as f:
+            f.seek(offset)
+            data = f.read()
+        # 末尾不完整的行留到下次（只有进程崩溃才会出现）
+        end = data.rfind(b'\n') + 1
+        entries = []
+        broken = 0
+        for line in data[:end].splitlines():
+            try:
+                user_id, day, count, timestamp = json.loads(line)
+                entries.append((user_id, _journal_record(day, count, timestamp)))
+            except Exception:
+                broken += 1
+        return entries, broken, offset + end
+
+    def _apply_changes(self, changes: tuple):
+        generation, records, aggregates, entries, broken, offset, stamp = changes
+        if records is not None:
+            self._records = records
+            self._aggregates = aggregates
+        for user_id, record in entries:
+            if record is None:
+                self._pop(user_id)
+            else:
+                self._put(user_id, record)
+        self._generation = generation
+        self._journal_offset = offset
+        self._journal_size = offset
+        self._stamp = stamp
+        if broken:
+            logger.warning(f"共享点赞日志中有 {broken} 行无法解析，已忽略")
+        if broken or self._journal_size >= self.compact_bytes:
+            self._mark_dirty()
+
+    async def get(self, user_id: str):
+        await self._refresh()
+        return await super().get(user_id)
+
+    async def is_liked_on(self, user_id: str, day: int) -> bool:
+        await self._refresh()
+        return await super().is_liked_on(user_id, day)
+
+    async def day_stats(self, day: int) -> tuple:
+        await self._refresh()
+        return self._aggregates.get(day)
+
+    async def recent_stats(self, today: int, days: int) -> list:
+        await self._refresh()
+        return [(day, *self._aggregates.get(day)) for day in range(today - days + 1, today + 1)]
+
+    async def user_count(self) -> int:
+        await self._refresh()
+        return len(self._records)
+
+    async def all_records(self) -> dict:
+        await self._refresh()
+        return records_to_json(self._records)
+
+    async def replace(self, records: dict):
+        """整体替换并立即写入共享快照"""
+        async def work(lock):
+            self._records = RecordTable.from_records(records_from_json(records))
+            self._rebuild_aggregates()
+            await self._compact_shared(lock)
+        await self._locked(True, work)
+
+    async def _append_entries(self, entries: list):
+        line = ''.join(json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + '\n' for entry in entries)
+
+        async def work(lock):
+            self._journal_offset, self._stamp = await self.io.submit(self._append_shared, line)
+            self._journal_size = self._journal_offset
+
+        try:
+            await self._locked(True, work)
+        except Exception as e:
+            logger.error(f"追加共享点赞日志失败: {e}")
+            self._mark_dirty()
+            return
+        # 同步其他进程的变更时可能覆盖了刚写入的本地记录，这里重新应用
+        for user_id, day, count, timestamp in entries:
+            record = _journal_record(day, count, timestamp)
+            if record is None:
+                self._pop(user_id)
+            else:
+                self._put(user_id, record)
+        if self._journal_size >= self.compact_bytes:
+            self._mark_dirty()
+
+    def _append_shared(self, line: str) -> tuple:
+        with open(self.journal_file, 'ab') as f:
+            if f.tell() != self._journal_offset:
+                # 其他进程崩溃时残留的半行，先补上换行让它成为一行无效记录
+                f.write(b'\n')
+            f.write(line.encode('utf-8'))
+            f.flush()
+            offset = f.tell()
+        return offset, self._stat_stamp()
+
+    async def flush(self):
+        """在排他锁下合并其他进程的变更后压缩进共享快照"""
+        if not self._dirty:
+            return
+        self._dirty = False
+        try:
+            await self._locked(True, self._compact_shared)
+        except Exception as e:
+            self._dirty = True
+            self._flush_failures += 1
+            logger.error(f"压缩共享点赞日志失败: {e}")
+
+    async def _compact_shared(self, lock: InterProcessLock):
+        self._prune(date.today().toordinal() - self.retention_days)
+        snapshot = self._records.copy()
+        daily = self._aggregates.rows()
+        generation = (self._generation or 0) + 1
+        self._stamp = await self.io.submit(self._write_shared_snapshot, lock, snapshot, daily, generation)
+        self._generation = generation
+        self._journal_offset = 0
+        self._journal_size = 0
+        # 同步时可能再次标记了压缩，本次已经包含这些变更
+        self._dirty = False
+        logger.debug(f"共享点赞日志已压缩: {self.snapshot_file} ({len(snapshot)} 条, 代数 {generation})")
+
+    def _write_shared_snapshot(self, lock: InterProcessLock, snapshot: RecordTable, daily: list,
+                               generation: int) -> tuple:
+        self._write_snapshot(snapshot, daily)
+        with open(self.journal_file, 'w', encoding='utf-8'):
+            pass
+        # 最后更新代数：其他进程看到新代数时快照一定已经写好
+        lock.write(str(generation).encode())
+        return self._stat_stamp()
+
+
+def _journal_record(day, count, timestamp):
+    """日志行转为 LikeRecord，删除标记返回 None；兼容旧版 ISO 字符串格式"""
+    if day is None:
+        return None
+    if isinstance(day, str):
+        return LikeRecord.from_dict({'date': day, 'count': count, 'timestamp': timestamp})
+    return LikeRecord(day, count, timestamp or 0)
+
+
+class SqliteLikeRecordStore(LikeRecordBackend):
+    """SQLite 存储：WAL 模式，按 user_id 主键和 date 索引查询
+
+    每日统计保存在 like_daily 表中，与记录在同一事务内按 _daily_change 更新。
+    """
+
+    def __init__(self, db_file: str, io: AsyncFileIO, legacy_json_file: str = None):
+        self.db_file = db_file
+        self.io = io
+        # 首次打开空库时从该 JSON 文件一次性迁移
+        self.legacy_json_file = legacy_json_file
+        # 连接只在持有数据库文件锁时于线程池中使用
+        self._conn = None
+
+    async def _run(self, func, *args):
+        return await self.io.run(self.db_file, func, *args)
+
+    async def load(self):
+        count = await self._run(self._open)
+        logger.info(f"已打开点赞记录数据库: {self.db_file} ({count} 条)")
+
+    def _open(self) -> int:
+        os.makedirs(os.path.dirname(self.db_file), exist_ok=True)
+        self._conn = sqlite3.connect(self.db_file, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS like_records ("
+            "user_id TEXT PRIMARY KEY, date TEXT NOT NULL, "
+            "count INTEGER NOT NULL, timestamp TEXT)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_like_records_date ON like_records(date)")
+        has_daily = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'like_daily'"
+        ).fetchone()
+        if not has_daily:
+            with self._conn:
+                self._conn.execute("BEGIN")
+                self._conn.execute(
+                    "CREATE TABLE like_daily (date TEXT PRIMARY KEY, users INTEGER NOT NULL, likes INTEGER NOT NULL)"
+                )
+                # 旧版数据库没有每日统计，按现有记录估算
+                self._rebuild_daily()
+        self._migrate_legacy_json()
+        return self._user_count()
+
+    def _rebuild_daily(self):
+        self._conn.execute("DELETE FROM like_daily")
+        self._conn.execute(
+            "INSERT INTO like_daily (date, users, likes) "
+            "SELECT date, COUNT(*), COALESCE(SUM(count), 0) FROM like_records GROUP BY date"
+        )
+
+    def _change_daily(self, user_id: str, new: tuple):
+        """写入或删除 user_id 的记录前更新每日统计，new 为 (date, count) 或 None（在事务中执行）"""
+        old = self._conn.execute("SELECT date, count FROM like_records WHERE user_id = ?", (user_id,)).fetchone()
+        undo, count = _daily_change(old[0] if old else None, new[0] if new else None)
+        if undo:
+            self._conn.execute("UPDATE like_daily SET users = users - 1, likes = likes - ? WHERE date = ?",
+                               (old[1], old[0]))
+        if count:
+            self._conn.execute(
+                "INSERT INTO like_daily (date, users, likes) VALUES (?, 1, ?) "
+                "ON CONFLICT(date) DO UPDATE SET users = users + 1, likes = likes + excluded.likes",
+                new
+            )
+
+    def _migrate_legacy_json(self):
+        """数据库为空且存在旧 JSON 记录时导入，导入后将 JSON 重命名为 .migrated"""
+        if not self.legacy_json_file or not os.path.exists(self.legacy_json_file):
+            return
+        if self._conn.execute("SELECT 1 FROM like_records LIMIT 1").fetchone():
+            return
+        try:
+            records = read_json_file(self.legacy_json_file, {})
+            rows = [
+                (user_id, record['date'], int(record.get('count', 0)), record.get('timestamp'))
+                for user_id, record in records.items()
+                if isinstance(record, dict) and 'date' in record
+            ]
+            with self._conn:
+                self._conn.execute("BEGIN")
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO like_records (user_id, date, count, timestamp) VALUES (?, ?, ?, ?)",
+                    rows
+                )
+                self._rebuild_daily()
+            os.replace(self.legacy_json_file, self.legacy_json_file + '.migrated')
+            logger.info(f"已从 {self.legacy_json_file} 迁移 {len(rows)} 条点赞记录到数据库")
+        except Exception as e:
+            logger.error(f"迁移旧点赞记录失败: {e}")
+
+    async def all_records(self) -> dict:
+        return await self._run(self._all_records)
+
+    def _all_records(self) -> dict:
+        return {
+            user_id: {'date': day, 'count': count, 'timestamp': timestamp}
+            for user_id, day, count, timestamp in self._conn.execute(
+                "SELECT user_id, date, count, timestamp FROM like_records"
+            )
+        }
+
+    async def get(self, user_id: str):
+        row = await self._run(self._fetchone,
+                              "SELECT date, count, timestamp FROM like_records WHERE user_id = ?", (user_id,))
+        if row is None:
+            return None
+        return LikeRecord.from_dict({'date': row[0], 'count': row[1], 'timestamp': row[2]})
+
+    async def is_liked_on(self, user_id: str, day: int) -> bool:
+        row = await self._run(self._fetchone,
+                              "SELECT 1 FROM like_records WHERE user_id = ? AND date = ?",
+                              (user_id, date.fromordinal(day).isoformat()))
+        return row is not None
+
+    async def set(self, user_id: str, record: LikeRecord):
+        data = record.to_dict()
+        await self._run(self._set_many, [(user_id, data['date'], data['count'], data['timestamp'])])
+
+    async def set_many(self, records: dict):
+        rows = []
+        for user_id, record in records.items():
+            data = record.to_dict()
+            rows.append((user_id, data['date'], data['count'], data['timestamp']))
+        if rows:
+            await self._run(self._set_many, rows)
+
+    def _set_many(self, rows: list):
+        with self._conn:
+            self._conn.execute("BEGIN")
+            for user_id, day, count, _ in rows:
+                self._change_daily(user_id, (day, count))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO like_records (user_id, date, count, timestamp) VALUES (?, ?, ?, ?)",
+                rows
+            )
+
+    async def delete(self, user_id: str):
+        await self._run(self._delete, user_id)
+
+    def _delete(self, user_id: str):
+        with self._conn:
+            self._conn.execute("BEGIN")
+            self._change_daily(user_id, None)
+            self._conn.execute("DELETE FROM like_records WHERE user_id = ?", (user_id,))
+
+    async def replace(self, records: dict):
+        await self._run(self._replace, records)
+
+    def _replace(self, records: dict):
+        with self._conn:
+            self._conn.execute("BEGIN")
+            self._conn.execute("DELETE FROM like_records")
+            self._conn.executemany(
+                "INSERT INTO like_records (user_id, date, count, timestamp) VALUES (?, ?, ?, ?)",
+                [(user_id, r['date'], r['count'], r.get('timestamp')) for user_id, r in records.items()]
+            )
+            self._rebuild_daily()
+
+    async def day_stats(self, day: int) -> tuple:
+        row = await self._run(self._fetchone, "SELECT users, likes FROM like_daily WHERE date = ?",
+                              (date.fromordinal(day).isoformat(),))
+        return tuple(row) if row else (0, 0)
+
+    async def recent_stats(self, today: int, days: int) -> list:
+        rows = await self._run(
+            self._fetchall,
+            "SELECT date, users, likes FROM like_daily WHERE date >= ? AND date <= ?",
+            (date.fromordinal(today - days + 1).isoformat(), date.fromordinal(today).isoformat())
+        )
+        by_day = {date.fromisoformat(day).toordinal(): (users, total) for day, users, total in rows}
+        return [(day, *by_day.get(day, (0, 0))) for day in range(today - days + 1, today + 1)]
+
+    async def user_count(self) -> int:
+        return await self._run(self._user_count)
+
+    def _user_count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM like_records").fetchone()[0]
+
+    async def remove_expired(self, retention_days: int, today: int) -> int:
+        cutoff = date.fromordinal(today - retention_days).isoformat()
+        return await self._run(self._remove_expired, cutoff)
+
+    def _remove_expired(self, cutoff: str) -> int:
+        with self._conn:
+            self._conn.execute("BEGIN")
+            self._conn.execute("DELETE FROM like_daily WHERE date < ?", (cutoff,))
+            return self._conn.execute("DELETE FROM like_records WHERE date < ?", (cutoff,)).rowcount
+
+    def _fetchone(self, sql: str, params: tuple):
+        return self._conn.execute(sql, params).fetchone()
+
+    def _fetchall(self, sql: str, params: tuple) -> list:
+        return self._conn.execute(sql, params).fetchall()
+
+    async def close(self):
+        if self._conn is not None:
+            await self._run(self._conn.close)
+            self._conn = None
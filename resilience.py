@@ -0,0 +1,167 @@
+import asyncio
+import random
+import time
+
+from astrbot.api import logger
+
+
+class LikeErrorClassifier:
+    """send_like 异常分类，可继承或替换以适配其他协议端
+
+    LIMIT: 今日点赞次数已达上限，记为已点赞；
+    TRANSIENT: 超时、断线等暂时性错误，会重试并计入熔断；
+    FATAL: 其他错误（如非好友），不重试。
+    """
+
+    LIMIT = 'limit'
+    TRANSIENT = 'transient'
+    FATAL = 'fatal'
+
+    LIMIT_KEYWORDS = (
+        "点赞数已达上限",
+        "retcode=1200",
+        "今日同一好友点赞数已达上限",
+        "点赞失败 今日同一好友点赞数已达上限",
+    )
+    LIMIT_RETCODES = (1200,)
+    TRANSIENT_KEYWORDS = ("timeout", "timed out", "disconnect", "not connected", "websocket", "connection")
+    TRANSIENT_TYPES = (asyncio.TimeoutError, TimeoutError, ConnectionError)
+
+    def classify(self, error: BaseException) -> str:
+        if getattr(error, 'retcode', None) in self.LIMIT_RETCODES:
+            return self.LIMIT
+        message = str(error)
+        if any(keyword in message for keyword in self.LIMIT_KEYWORDS):
+            return self.LIMIT
+        if isinstance(error, self.TRANSIENT_TYPES) or type(error).__name__ == 'NetworkError':
+            return self.TRANSIENT
+        message = message.lower()
+        if any(keyword in message for keyword in self.TRANSIENT_KEYWORDS):
+            return self.TRANSIENT
+        return self.FATAL
+
+
+class CircuitOpenError(Exception):
+    """熔断器打开期间的调用直接失败"""
+
+
+class CircuitBreaker:
+    """连续失败 failure_threshold 次后打开，reset_timeout 秒后放行一次探测调用（半开），
+    探测成功则关闭，失败则重新打开"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+
+    def is_open(self) -> bool:
+        """当前调用是否会被直接拒绝（不占用半开探测名额）"""
+        if self.state == self.OPEN:
+            return time.monotonic() - self.opened_at < self.reset_timeout
+        return self.state == self.HALF_OPEN and self._probing
+
+    def allow(self) -> bool:
+        """是否放行本次调用；半开状态下只放行一次探测"""
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.state = self.HALF_OPEN
+            self._probing = False
+        if self._probing:
+            return False
+        self._probing = True
+        return True
+
+    def record_success(self):
+        if self.state != self.CLOSED:
+            logger.info(f"平台 {self.name} 的点赞调用已恢复")
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._probing = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(f"平台 {self.name} 的点赞调用连续失败 {self.failures} 次，暂停 {self.reset_timeout} 秒")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+
+class LikeCallGuard:
+    """send_like 调用的超时、重试与按平台熔断
+
+    每次尝试单独限时 timeout 秒；暂时性错误按带抖动的指数退避重试，最多
+    attempts 次；熔断器打开期间直接抛出 CircuitOpenError。
+    """
+
+    def __init__(self, classifier: LikeErrorClassifier = None, attempts: int = 3, base_delay: float = 0.5,
+                 max_delay: float = 5.0, timeout: float = 10.0, failure_threshold: int = 5,
+                 reset_timeout: float = 30.0):
+        self.classifier = classifier or LikeErrorClassifier()
+        self.attempts = max(1, attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.timeout = timeout
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._breakers = {}
+        self.retries = 0
+        self.rejected = 0
+
+    def breaker(self, platform: str) -> CircuitBreaker:
+        breaker = self._breakers.get(platform)
+        if breaker is None:
+            breaker = self._breakers[platform] = CircuitBreaker(
+                platform, self.failure_threshold, self.reset_timeout
+            )
+        return breaker
+
+    def check(self, platform: str):
+        """熔断中时直接抛出 CircuitOpenError，用于排队之前的快速失败"""
+        if self.breaker(platform).is_open():
+            self.rejected += 1
+            raise CircuitOpenError(f"平台 {platform} 的点赞调用暂时不可用")
+
+    async def call(self, platform: str, call):
+        """执行 call()（返回协程的无参函数），返回其结果或抛出最后一次的异常"""
+        breaker = self.breaker(platform)
+        for attempt in range(self.attempts):
+            if not breaker.allow():
+                self.rejected += 1
+                raise CircuitOpenError(f"平台 {platform} 的点赞调用暂时不可用")
+            try:
+                result = await asyncio.wait_for(call(), self.timeout) if self.timeout > 0 else await call()
+            except Exception as e:
+                if self.classifier.classify(e) != LikeErrorClassifier.TRANSIENT:
+                    # 协议端正常返回了错误，连接本身没有问题
+                    breaker.record_success()
+                    raise
+                breaker.record_failure()
+                if attempt + 1 >= self.attempts:
+                    raise
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+                logger.debug(f"send_like 暂时性错误: {e!r}，{delay:.2f} 秒后第 {attempt + 2} 次尝试")
+                self.retries += 1
+                await asyncio.sleep(delay)
+            else:
+                breaker.record_success()
+                return result
+
+    def stats(self) -> dict:
+        return {
+            'retries': self.retries,
+            'rejected': self.rejected,
+            'breakers': {name: breaker.state for name, breaker in self._breakers.items()},
+        }
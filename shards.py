@@ -0,0 +1,273 @@
+import asyncio
+import os
+import re
+import zlib
+from datetime import date
+
+from astrbot.api import logger
+
+from .persistence import AsyncFileIO
+from .records import LikeRecordBackend
+
+# 命名空间目录名中只保留这些字符
+_UNSAFE_CHARS = re.compile(r'[^0-9A-Za-z_.-]')
+
+
+class ShardedLikeRecordStore:
+    """按 (平台, 机器人账号) 分片的点赞记录存储
+
+    每个命名空间是 shards/<平台>_<机器人账号>/ 下的一组独立存储后端，还可以按
+    user_id 的 CRC32 再分为 partitions 个分区。分片之间的写盘、压缩和过期清理
+    互不影响；定位分片只是两次字典查找。load() 只扫描磁盘上已有的分片目录，
+    分片在首次使用时创建并加载（加载后先清理过期记录），preload() 可在后台预先
+    加载全部已有分片。
+
+    enabled=False 时所有记录都在命名空间 '' 下，即原来的 like_records.json。
+    启用分片或分区时，原有的全局记录作为兼容数据，在过期清空之前仍参与
+    “今天是否已点赞”的判断，但不再写入新记录。
+    """
+
+    SHARD_DIR = 'shards'
+
+    def __init__(self, records_file: str, io: AsyncFileIO, factory, enabled: bool = True, partitions: int = 1,
+                 retention_days: int = 7):
+        # records_file 为原来的全局记录文件，分片目录与它位于同一目录下
+        self.records_file = records_file
+        self.shard_root = os.path.join(os.path.dirname(records_file), self.SHARD_DIR)
+        self.io = io
+        # factory(file_path) -> LikeRecordBackend，由插件按存储配置创建后端
+        self.factory = factory
+        self.enabled = enabled
+        self.partitions = max(1, partitions)
+        # 分片加载后立即清理早于该天数的记录
+        self.retention_days = retention_days
+        # (命名空间, 分区) -> 已加载的后端
+        self._shards = {}
+        # (命名空间, 分区) -> 正在加载的 Task，避免并发请求重复创建同一个分片
+        self._loading = {}
+        # (平台, 机器人账号) -> 命名空间
+        self._namespaces = {}
+        # 磁盘上已有或已创建的命名空间
+        self._known = set()
+        # 原全局记录：是否存在，以及加载它的 Task（首次使用时创建）
+        self._has_legacy = False
+        self._legacy_task = None
+
+    def namespace(self, platform: str, self_id) -> str:
+        """(平台, 机器人账号) 对应的命名空间，即分片目录名"""
+        if not self.enabled:
+            return ''
+        key = (platform, self_id)
+        namespace = self._namespaces.get(key)
+        if namespace is None:
+            namespace = _UNSAFE_CHARS.sub('_', f"{platform or 'unknown'}_{self_id or 'unknown'}")
+            self._namespaces[key] = namespace
+        return namespace
+
+    def _partition(self, user_id: str) -> int:
+        if self.partitions == 1:
+            return 0
+        return zlib.crc32(str(user_id).encode('utf-8')) % self.partitions
+
+    def shard_file(self, namespace: str, partition: int = 0) -> str:
+        if not namespace:
+            base = os.path.splitext(self.records_file)[0]
+        else:
+            base = os.path.join(self.shard_root, namespace, 'like_records')
+        if self.partitions > 1:
+            base += f'.p{partition}'
+        return base + '.json'
+
+    async def load(self):
+        """扫描磁盘上已有的分片和启用分片前的全局记录，不加载记录内容"""
+        namespaces, self._has_legacy = await self.io.submit(self._discover)
+        self._known.update(namespaces)
+        logger.debug(f"点赞记录分片: {len(namespaces)} 个命名空间")
+
+    async def preload(self):
+        """加载全部已有分片和原全局记录"""
+        for namespace in sorted(self._known):
+            for partition in range(self.partitions):
+                await self._load_shard(namespace, partition)
+        await self._legacy_store()
+        logger.debug(f"已加载点赞记录分片: {len(self._shards)} 个")
+
+    def _discover(self) -> tuple:
+        """返回 (已有的命名空间, 是否需要加载原全局记录)"""
+        # 未分片也未分区时，全局记录文件就是命名空间 '' 的分片文件，不是兼容数据
+        has_legacy = (self.enabled or self.partitions > 1) and any(
+            os.path.exists(os.path.splitext(self.records_file)[0] + ext)
+            for ext in ('.json', '.bin', '.journal', '.db')
+        )
+        if not self.enabled:
+            return [''], has_legacy
+        if not os.path.isdir(self.shard_root):
+            return [], has_legacy
+        namespaces = sorted(name for name in os.listdir(self.shard_root)
+                            if os.path.isdir(os.path.join(self.shard_root, name)))
+        return namespaces, has_legacy
+
+    async def shard(self, namespace: str, user_id: str) -> LikeRecordBackend:
+        """用户所在的分片后端，首次使用时创建并加载"""
+        key = (namespace, self._partition(user_id))
+        backend = self._shards.get(key)
+        if backend is not None:
+            return backend
+        return await self._load_shard(*key)
+
+    async def _load_shard(self, namespace: str, partition: int) -> LikeRecordBackend:
+        key = (namespace, partition)
+        backend = self._shards.get(key)
+        if backend is not None:
+            return backend
+        task = self._loading.get(key)
+        if task is None:
+            task = self._loading[key] = asyncio.ensure_future(self._open_shard(namespace, partition))
+            task.add_done_callback(lambda _: self._loading.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _open_shard(self, namespace: str, partition: int) -> LikeRecordBackend:
+        file_path = self.shard_file(namespace, partition)
+        await self.io.submit(os.makedirs, os.path.dirname(file_path), 0o777, True)
+        backend = self.factory(file_path)
+        await backend.load()
+        await self._prune_loaded(backend, file_path)
+        self._shards[(namespace, partition)] = backend
+        self._known.add(namespace)
+        return backend
+
+    async def _legacy_store(self):
+        """原全局记录的后端，不存在或已全部过期时返回 None"""
+        if not self._has_legacy:
+            return None
+        if self._legacy_task is None:
+            self._legacy_task = asyncio.ensure_future(self._open_legacy())
+        return await asyncio.shield(self._legacy_task)
+
+    async def _open_legacy(self):
+        legacy = self.factory(self.records_file)
+        await legacy.load()
+        await self._prune_loaded(legacy, self.records_file)
+        if await legacy.user_count():
+            logger.info("已加载启用分片前的点赞记录（只读，过期后自动停用）")
+            return legacy
+        await legacy.close()
+        self._has_legacy = False
+        return None
+
+    async def _prune_loaded(self, backend: LikeRecordBackend, file_path: str):
+        """刚加载的后端先清理过期记录，未加载的分片不需要等每天的清理任务"""
+        try:
+            removed = await backend.remove_expired(self.retention_days, date.today().toordinal())
+            if removed:
+                logger.info(f"清理了 {removed} 条过期记录: {file_path}")
+        except Exception as e:
+            logger.error(f"清理过期记录失败: {file_path}: {e}")
+
+    async def _namespace_shards(self, namespace: str) -> list:
+        """命名空间内的全部分区，磁盘上已有的命名空间先加载完整"""
+        if namespace in self._known:
+            return [await self._load_shard(namespace, partition) for partition in range(self.partitions)]
+        return []
+
+    async def get(self, namespace: str, user_id: str):
+        return await (await self.shard(namespace, user_id)).get(user_id)
+
+    async def set(self, namespace: str, user_id: str, record):
+        await (await self.shard(namespace, user_id)).set(user_id, record)
+
+    async def set_many(self, namespace: str, records: dict):
+        """按分区批量写入，每个分区一次提交"""
+        partitioned = {}
+        for user_id, record in records.items():
+            partitioned.setdefault(self._partition(user_id), {})[user_id] = record
+        for partition, part in partitioned.items():
+            await (await self._load_shard(namespace, partition)).set_many(part)
+
+    async def delete(self, namespace: str, user_id: str):
+        await (await self.shard(namespace, user_id)).delete(user_id)
+
+    async def is_liked_on(self, namespace: str, user_id: str, day: int) -> bool:
+        if await (await self.shard(namespace, user_id)).is_liked_on(user_id, day):
+            return True
+        if not self._has_legacy:
+            return False
+        legacy = await self._legacy_store()
+        return legacy is not None and await legacy.is_liked_on(user_id, day)
+
+    async def recent_stats(self, namespace: str, today: int, days: int) -> list:
+        """命名空间内各分区每天的 (日序号, 点赞人数, 总点赞数) 之和"""
+        totals = {day: [0, 0] for day in range(today - days + 1, today + 1)}
+        for backend in await self._namespace_shards(namespace):
+            for day, users, likes in await backend.recent_stats(today, days):
+                totals[day][0] += users
+                totals[day][1] += likes
+        return [(day, users, likes) for day, (users, likes) in totals.items()]
+
+    async def user_count(self, namespace: str) -> int:
+        return sum([await backend.user_count() for backend in await self._namespace_shards(namespace)])
+
+    async def storage_stats(self) -> list:
+        """已加载的各命名空间的 (命名空间, 记录数, 磁盘占用字节数)"""
+        namespaces = sorted({namespace for namespace, _ in self._shards})
+        sizes = await self.io.submit(self._disk_usage, namespaces)
+        return [(namespace, await self.user_count(namespace), sizes[namespace]) for namespace in namespaces]
+
+    def _disk_usage(self, namespaces: list) -> dict:
+        # 快照、日志、数据库等文件都以记录文件名开头
+        prefix = os.path.splitext(os.path.basename(self.records_file))[0]
+        usage = {}
+        for namespace in namespaces:
+            total = 0
+            try:
+                with os.scandir(os.path.dirname(self.shard_file(namespace))) as entries:
+                    for entry in entries:
+                        if entry.name.startswith(prefix) and entry.is_file():
+                            total += entry.stat().st_size
+            except OSError:
+                pass
+            usage[namespace] = total
+        return usage
+
+    async def all_records(self, namespace: str) -> dict:
+        """命名空间内全部记录的 JSON 格式"""
+        records = {}
+        for backend in await self._namespace_shards(namespace):
+            records.update(await backend.all_records())
+        return records
+
+    async def replace(self, namespace: str, records: dict):
+        """用 JSON 格式的记录整体替换命名空间内的记录"""
+        partitioned = [{} for _ in range(self.partitions)]
+        for user_id, record in records.items():
+            partitioned[self._partition(user_id)][user_id] = record
+        for partition, part in enumerate(partitioned):
+            await (await self._load_shard(namespace, partition)).replace(part)
+
+    async def remove_expired(self, retention_days: int, today: int) -> int:
+        """清理已加载分片的过期记录，返回删除总数
+
+        尚未加载的分片不在这里加载，它们在首次加载时自行清理。
+        """
+        removed = 0
+        for backend in list(self._shards.values()):
+            removed += await backend.remove_expired(retention_days, today)
+        legacy = await self._legacy_store() if self._legacy_task is not None else None
+        if legacy is not None:
+            removed += await legacy.remove_expired(retention_days, today)
+            if not await legacy.user_count():
+                await legacy.close()
+                self._has_legacy = False
+                self._legacy_task = None
+                logger.info("启用分片前的点赞记录已全部过期")
+        return removed
+
+    async def close(self):
+        for task in list(self._loading.values()):
+            await asyncio.gather(task, return_exceptions=True)
+        for backend in self._shards.values():
+            await backend.close()
+        if self._legacy_task is not None:
+            legacy = (await asyncio.gather(self._legacy_task, return_exceptions=True))[0]
+            if isinstance(legacy, LikeRecordBackend):
+                await legacy.close()